@@ -1,3 +1,5 @@
+from typing import List
+
 from GameAction import GameAction
 from GameState import GameState
 
@@ -7,3 +9,28 @@ class Bot(object):
     def get_action(self, state: GameState) -> GameAction:
         # Returns action based on state.
         raise NotImplementedError()
+
+    def get_actions(self, states: List[GameState]) -> List[GameAction]:
+        # Returns actions of many games at once, in order. Override it to
+        # share work between games.
+        return [self.get_action(state) for state in states]
+
+    def prepare(self, rows: int, cols: int):
+        # Called before games of a board size. Override it to set up what
+        # the bot needs, raising an error if it cannot play that size.
+        pass
+
+    def ponder(self, state: GameState):
+        # Called with the state of the opponent's turn. Override it to keep
+        # thinking in the background until the next get_action.
+        pass
+
+    def progress(self) -> int:
+        # Returns the number of positions searched so far by the running
+        # get_action, 0 if unknown. Called from another thread.
+        return 0
+
+    def stop(self):
+        # Stops the running get_action early and any background thinking.
+        # Called from another thread.
+        pass
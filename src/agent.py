@@ -1,11 +1,20 @@
 """Agent abstract class."""
-from threading import Timer
+from threading import Event
+from typing import Optional
 
-from datatypes import Eval, Move
+from bitboard import BitBoard
+from datatypes import Engine, Eval, Move
+from deadline import Deadline
+from GameState import GameState
 from pseudoboard import PseudoBoard
 
 THINKING_TIME = 4.9
 
+ENGINES = {
+    'numpy': PseudoBoard,
+    'bitboard': BitBoard,
+}
+
 
 class Agent(object):
     """An interface for agent.
@@ -13,6 +22,11 @@ class Agent(object):
     Inherit this to create your own agents.
     """
 
+    thinking_time = THINKING_TIME
+    deadline: Deadline = None
+    # Set by the bot to stop a search whose deadline does not exist yet
+    stop_event: Optional[Event] = None
+
     def __init__(self):
         """Initialize the agent."""
         self.board: PseudoBoard = None
@@ -25,15 +39,12 @@ class Agent(object):
         Returns:
             Eval: The evaluation result.
         """
-        self.timer = Timer(THINKING_TIME, self.force_stop)
-        self.timeout = False
-        self.timer.start()
-
+        self.deadline = Deadline(self.thinking_time)
+        if self.stop_event is not None and self.stop_event.is_set():
+            self.deadline.stop()
         rand_move = self.board.available_moves(randomize=True)[0]
         res = self._search()
 
-        if not self.timeout:
-            self.timer.cancel()
         if res is None or res.move is None:
             # return random move
             res = Eval(
@@ -49,9 +60,19 @@ class Agent(object):
             score=res.score,
         )
 
+    @property
+    def timeout(self) -> bool:
+        """Check if the search has been stopped.
+
+        Returns:
+            bool: True once the hard limit is found passed, or if stopped.
+        """
+        return self.deadline is not None and self.deadline.stopped
+
     def force_stop(self):
-        """Toggle timeout flag to True when timeout."""
-        self.timeout = True
+        """Stop the search at its next deadline check."""
+        if self.deadline is not None:
+            self.deadline.stop()
 
     def _search(self) -> Eval:
         """Return the evaluation result of the agent.
@@ -62,3 +83,16 @@ class Agent(object):
             NotImplementedError: If not implemented.
         """
         raise NotImplementedError()
+
+
+def make_board(state: GameState, engine: Engine = 'numpy') -> PseudoBoard:
+    """Create a board of the selected engine from game state.
+
+    Args:
+        state (GameState): Game state to infer board from.
+        engine (Engine, optional): Board engine to use. Defaults to 'numpy'.
+
+    Returns:
+        PseudoBoard: The board.
+    """
+    return ENGINES[engine](state)
@@ -0,0 +1,246 @@
+"""Vectorized evaluation of every child of a board.
+
+Instead of playing, evaluating and reverting moves one by one, the edges
+of all children are stacked in a (children x edges) array and captures,
+openings, chains and loops of every child are computed at once:
+    - openings of every tile, and boxes completed by the move;
+    - links between chainable neighbors, and components labeled by
+      spreading the smallest tile index along links;
+    - size, links and open ends of every component, summed into the same
+      counters as ChainTracker, then the same heuristics as PseudoBoard.
+Children of several boards of the same layout can be stacked together, so
+that many games are evaluated with a single pass of array operations.
+"""
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+from datatypes import Moves
+from layout import Layout
+from player import Player
+from pseudoboard import PseudoBoard
+
+# Available moves, their objective values and boxes each completes
+Children = Tuple[Moves, np.ndarray, np.ndarray]
+
+
+class BatchEvaluator(object):
+    """Arrays of a layout used to evaluate children of its boards."""
+
+    def __init__(self, layout: Layout):
+        """Build the arrays of a layout.
+
+        Args:
+            layout (Layout): Layout of the board.
+        """
+        self.layout = layout
+        self.tile_edges = np.array(layout.tile_edges)
+        size = layout.size
+        # Neighbor tile and shared edge in the 4 directions, 0 if none
+        self.neighbors = np.zeros((size, 4), int)
+        self.shared = np.zeros((size, 4), int)
+        self.valid = np.zeros((size, 4), bool)
+        for tile in range(size):
+            for direction, (neighbor, edge) in enumerate(
+                layout.neighbors[tile],
+            ):
+                self.neighbors[tile, direction] = neighbor
+                self.shared[tile, direction] = edge
+                self.valid[tile, direction] = True
+        self.tiles = np.arange(size)
+        # Edge -> tiles it closes
+        self.incidence = np.zeros((layout.edge_count, size), int)
+        for edge, tiles in enumerate(layout.edge_tiles):
+            self.incidence[edge, list(tiles)] = 1
+
+    def edges_array(self, edges: int) -> np.ndarray:
+        """Unpack an edges bitmask.
+
+        Args:
+            edges (int): Bitmask of edges.
+
+        Returns:
+            np.ndarray: Marked state of every edge.
+        """
+        count = self.layout.edge_count
+        packed = edges.to_bytes((count + 7) // 8, 'little')
+        bits = np.frombuffer(packed, np.uint8)
+        return np.unpackbits(bits, bitorder='little')[:count].astype(bool)
+
+    def evaluate(
+        self,
+        board: PseudoBoard,
+        player: Player,
+        use_eval=True,
+    ) -> Children:
+        """Evaluate every child of a board for a player.
+
+        Args:
+            board (PseudoBoard): The board.
+            player (Player): Player to evaluate for.
+            use_eval (bool, optional): Use heuristics. Defaults to True.
+
+        Returns:
+            Children: Available moves, in layout order, their objective
+                values, and the number of boxes each completes.
+        """
+        return self.evaluate_many([board], [player], use_eval)[0]
+
+    def evaluate_many(
+        self,
+        boards: List[PseudoBoard],
+        players: List[Player],
+        use_eval=True,
+    ) -> List[Children]:
+        """Evaluate every child of many boards at once.
+
+        Args:
+            boards (List[PseudoBoard]): Boards of this layout.
+            players (List[Player]): Player to evaluate for, by board.
+            use_eval (bool, optional): Use heuristics. Defaults to True.
+
+        Returns:
+            List[Children]: Children of every board, in order.
+        """
+        results: List[Children] = []
+        factors = []
+        unmarked = []
+        opens = []
+        for (board, player) in zip(boards, players):
+            base = self.edges_array(board.tracker.edges)
+            free = np.flatnonzero(~base)
+
+            # Openings and captures, children only differ by their move
+            before = 4 - base[self.tile_edges].sum(axis=1)
+            closed = self.incidence[free]
+            opened = before - closed
+            captured = ((opened == 0) & (closed > 0)).sum(axis=1)
+            mover = 1 if board.player == player else -1
+            scores = board.utility(player) + captured * mover
+            moves = [self.layout.moves[idx] for idx in free]
+            results.append((moves, scores, captured))
+            if not use_eval:
+                continue
+
+            # Heuristics are for the player to move next
+            factors.append(np.where(captured > 0, mover, -mover))
+            # Lines between neighbors left open in every child
+            unmarked.append(
+                self.valid &
+                ~base[self.shared] &
+                (self.shared != free[:, None, None]),
+            )
+            opens.append(opened)
+        if not use_eval or not results:
+            return results
+
+        heuristics = self.heuristics(
+            np.concatenate(unmarked),
+            np.concatenate(opens),
+        )
+        splits = np.cumsum([len(moves) for (moves, _, _) in results])[:-1]
+        return [
+            (moves, scores + factor * values, captured)
+            for ((moves, scores, captured), factor, values) in zip(
+                results, factors, np.split(heuristics, splits),
+            )
+        ]
+
+    def solvable(self, board: PseudoBoard) -> np.ndarray:
+        """Find children made of chains and loops only.
+
+        Args:
+            board (PseudoBoard): The board.
+
+        Returns:
+            np.ndarray: True for children whose boxes left all have two
+                openings, in the order of available moves.
+        """
+        base = self.edges_array(board.tracker.edges)
+        free = np.flatnonzero(~base)
+        before = 4 - base[self.tile_edges].sum(axis=1)
+        opens = before - self.incidence[free]
+        settled = ((opens == 0) | (opens == 2)).all(axis=1)
+        return settled & (opens == 2).any(axis=1)
+
+    def heuristics(
+        self,
+        unmarked: np.ndarray,
+        opens: np.ndarray,
+    ) -> np.ndarray:
+        """Compute chain, free squares and loop values of children.
+
+        Args:
+            unmarked (np.ndarray): Open line to every neighbor of every
+                tile of every child.
+            opens (np.ndarray): Openings of every tile of every child.
+
+        Returns:
+            np.ndarray: Sum of the heuristics of every child.
+        """
+        (count, size) = opens.shape
+        chainable = (opens > 0) & (opens < 3)
+        links = (
+            unmarked &
+            chainable[:, :, None] &
+            chainable[:, self.neighbors]
+        )
+        degree = links.sum(axis=2)
+
+        # Spread the smallest tile index over components, then jump to the
+        # label of the label so long chains take a few rounds
+        labels = np.where(chainable, self.tiles, size)
+        padded = np.full((count, size + 1), size)
+        while True:
+            spread = np.where(links, labels[:, self.neighbors], size)
+            merged = np.minimum(labels, spread.min(axis=2))
+            padded[:, :size] = merged
+            merged = np.take_along_axis(padded, merged, axis=1)
+            if (merged == labels).all():
+                break
+            labels = merged
+
+        # Sum tiles, links and open ends by component
+        rows = np.repeat(np.arange(count), size)
+        keys = (rows * (size + 1) + labels.ravel())[chainable.ravel()]
+        length = count * (size + 1)
+        sizes = np.bincount(keys, minlength=length).reshape(count, -1)
+        degrees = np.bincount(
+            keys, degree.ravel()[chainable.ravel()], length,
+        ).reshape(count, -1)
+        ends = np.bincount(
+            keys, ((degree == 1) & (opens == 2)).ravel()[chainable.ravel()],
+            length,
+        ).reshape(count, -1)
+
+        loops = (sizes > 0) & (degrees == 2 * sizes)
+        short = (sizes == 2) & ~loops
+        long = (sizes >= 3) & ~loops
+        free_squares = ((degree == 0) & (opens == 1)).sum(axis=1)
+        loop_tiles = (sizes * loops).sum(axis=1)
+        noscs = 2 * (short & (ends == 0)).sum(axis=1)
+        oscs = 2 * (short & (ends == 2)).sum(axis=1)
+        hoscs = 2 * (short & (ends == 1)).sum(axis=1)
+        open_long = long & (ends == 2)
+        olcs = (sizes * open_long).sum(axis=1)
+        len_olcs = open_long.sum(axis=1)
+        nolcs = (sizes * (long & ~open_long)).sum(axis=1)
+
+        # Same as PseudoBoard.chain_value, whose factor is always -1
+        ov = np.where(len_olcs > 0, olcs - 4 * len_olcs + 4, 0)
+        chains = noscs + hoscs - oscs + nolcs + ov
+        return chains + free_squares - loop_tiles
+
+
+@lru_cache(maxsize=None)
+def get_evaluator(layout: Layout) -> BatchEvaluator:
+    """Get the (cached) evaluator of a layout.
+
+    Args:
+        layout (Layout): Layout of the board.
+
+    Returns:
+        BatchEvaluator: The evaluator.
+    """
+    return BatchEvaluator(layout)
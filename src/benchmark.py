@@ -0,0 +1,411 @@
+"""Search benchmark on a fixed corpus of positions.
+
+Every position is searched by MinimaxAgent at a fixed depth, then with
+a fixed thinking time, and nodes, nodes per second, time to reach every
+depth, best move and score are reported. Results can be written as JSON
+and compared with a previous run to catch regressions.
+
+Another set of options can be run on the same positions and shown side
+by side, e.g. to compare search drivers. Both sets are then warmed up on
+every position first, and run by turns, each going first on every other
+position, so that neither one pays for cold caches alone.
+
+Examples:
+    python benchmark.py --output before.json
+    python benchmark.py --options "engine='bitboard'" --compare before.json
+    python benchmark.py --versus "mtdf=True"
+"""
+import argparse
+import math
+import json
+import sys
+from random import Random
+from time import perf_counter
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from game import HeadlessGame
+from GameAction import GameAction
+from GameState import GameState
+from logger import LOGGER
+from match_runner import parse_options
+from minimax_agent import MinimaxAgent
+
+# Relative drop of nodes per second reported as a regression
+NPS_TOLERANCE = 0.1
+
+
+class Position(NamedTuple):
+    """A benchmark position, replayed from a seeded game."""
+
+    name: str
+    rows: int
+    cols: int
+    moves: int
+    seed: int
+    depth: int
+
+
+CORPUS = (
+    Position('3x3-opening', 3, 3, 4, 1, 5),
+    Position('3x3-middle', 3, 3, 10, 2, 7),
+    Position('3x3-end', 3, 3, 16, 3, 8),
+    Position('4x4-opening', 4, 4, 6, 4, 4),
+    Position('4x4-middle', 4, 4, 16, 5, 5),
+    Position('4x4-end', 4, 4, 26, 6, 7),
+    Position('5x5-middle', 5, 5, 24, 7, 4),
+    Position('3x5-middle', 3, 5, 12, 8, 5),
+)
+
+
+def make_state(position: Position) -> GameState:
+    """Replay the game of a position.
+
+    Lines are drawn at random without giving away a box while possible,
+    like a game between careful players.
+
+    Args:
+        position (Position): The position.
+
+    Returns:
+        GameState: State of the game after the moves of the position.
+    """
+    rng = Random(position.seed)
+    game = HeadlessGame(position.rows, position.cols)
+    for _ in range(position.moves):
+        state = game.state()
+        actions = [
+            GameAction(orientation, (x, y))
+            for orientation, status in (
+                ('row', state.row_status),
+                ('col', state.col_status),
+            )
+            for (y, x) in zip(*(status == 0).nonzero())
+        ]
+        safe = [action for action in actions if is_safe(state, action)]
+        game.play(rng.choice(safe or actions))
+    return game.state()
+
+
+def is_safe(state: GameState, action: GameAction) -> bool:
+    """Check if an action leaves no box with a single opening.
+
+    Args:
+        state (GameState): The game state.
+        action (GameAction): The action.
+
+    Returns:
+        bool: True if no box around the line gets its third side.
+    """
+    (x, y) = action.position
+    (rows, cols) = state.board_status.shape
+    if action.action_type == 'row':
+        tiles = [(y, x), (y - 1, x)]
+    else:
+        tiles = [(y, x), (y, x - 1)]
+    return all(
+        state.row_status[ty, tx] + state.row_status[ty + 1, tx] +
+        state.col_status[ty, tx] + state.col_status[ty, tx + 1] < 2
+        for (ty, tx) in tiles
+        if 0 <= ty < rows and 0 <= tx < cols
+    )
+
+
+def fixed_agent(
+    state: GameState,
+    depth: int,
+    options: Dict[str, Any],
+) -> MinimaxAgent:
+    """Create an agent searching a fixed depth to the end.
+
+    Args:
+        state (GameState): The state to search.
+        depth (int): Depth to search.
+        options (Dict[str, Any]): Options of MinimaxAgent.
+
+    Returns:
+        MinimaxAgent: The agent, without time limit.
+    """
+    agent = MinimaxAgent(state, depth=depth, **options)
+    agent.thinking_time = math.inf
+    return agent
+
+
+def run_search(agent: MinimaxAgent) -> Dict[str, Any]:
+    """Search with an agent and measure it.
+
+    Args:
+        agent (MinimaxAgent): The agent.
+
+    Returns:
+        Dict[str, Any]: Nodes, seconds, nodes per second, move, score and
+            share of PVS probes searched again.
+    """
+    start = perf_counter()
+    (move, score) = agent.search()
+    seconds = perf_counter() - start
+    return {
+        'nodes': agent.evaluated,
+        'seconds': round(seconds, 4),
+        'nps': round(agent.evaluated / seconds),
+        'move': [move.orientation, *map(int, move.position)],
+        'score': float(score),
+        're_search_rate': round(
+            agent.researches / agent.probes if agent.probes else 0.0, 4,
+        ),
+    }
+
+
+def bench_position(
+    position: Position,
+    options: Dict[str, Any],
+    thinking_time: float,
+) -> Dict[str, Any]:
+    """Benchmark a position at fixed depth and with fixed time.
+
+    Args:
+        position (Position): The position.
+        options (Dict[str, Any]): Options of MinimaxAgent.
+        thinking_time (float): Seconds of the fixed time search.
+
+    Returns:
+        Dict[str, Any]: Results of both searches.
+    """
+    state = make_state(position)
+    fixed = run_search(fixed_agent(state, position.depth, options))
+    fixed['depth'] = position.depth
+
+    agent = MinimaxAgent(state, **options)
+    agent.thinking_time = thinking_time
+    timed = run_search(agent)
+    timed['depth'] = getattr(agent, 'completed_depth', None)
+    timed['time_to_depth'] = [
+        round(seconds, 4) for seconds in getattr(agent, 'depth_times', [])
+    ]
+    return {'name': position.name, 'fixed': fixed, 'timed': timed}
+
+
+def run_benchmark(
+    option_sets: List[Dict[str, Any]],
+    thinking_time: float,
+    names: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Benchmark the positions of the corpus with sets of options.
+
+    With more than one set, every set searches every position once before
+    anything is measured, then the sets take turns on every position.
+
+    Args:
+        option_sets (List[Dict[str, Any]]): Options of MinimaxAgent.
+        thinking_time (float): Seconds of the fixed time searches.
+        names (Optional[List[str]], optional): Positions to run, all if
+            None. Defaults to None.
+
+    Returns:
+        List[Dict[str, Any]]: Report of every set of options, in order.
+    """
+    positions = [
+        position
+        for position in CORPUS
+        if not names or position.name in names
+    ]
+    if len(option_sets) > 1:
+        for position in positions:
+            for options in option_sets:
+                state = make_state(position)
+                fixed_agent(state, position.depth, options).search()
+
+    results: List[List[Dict[str, Any]]] = [[] for _ in option_sets]
+    for (idx, position) in enumerate(positions):
+        order = list(range(len(option_sets)))
+        if idx % 2:
+            order.reverse()
+        for run in order:
+            results[run].append(
+                bench_position(position, option_sets[run], thinking_time),
+            )
+        if len(option_sets) == 1:
+            LOGGER.log(position_line(results[0][-1], thinking_time))
+    return [
+        make_report(options, thinking_time, run_results)
+        for (options, run_results) in zip(option_sets, results)
+    ]
+
+
+def position_line(result: Dict[str, Any], thinking_time: float) -> str:
+    """Describe the result of a position.
+
+    Args:
+        result (Dict[str, Any]): Result of the position.
+        thinking_time (float): Seconds of the fixed time search.
+
+    Returns:
+        str: Nodes and nodes per second of both searches.
+    """
+    (fixed, timed) = (result['fixed'], result['timed'])
+    return (
+        f'{result["name"]:<12} depth {fixed["depth"]}: '
+        f'{fixed["nodes"]:>8} nodes {fixed["nps"]:>7} nps | '
+        f'{thinking_time}s: depth {timed["depth"]}, '
+        f'{timed["nodes"]:>8} nodes {timed["nps"]:>7} nps'
+    )
+
+
+def make_report(
+    options: Dict[str, Any],
+    thinking_time: float,
+    results: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Sum up the results of a set of options.
+
+    Args:
+        options (Dict[str, Any]): Options of MinimaxAgent.
+        thinking_time (float): Seconds of the fixed time searches.
+        results (List[Dict[str, Any]]): Result of every position.
+
+    Returns:
+        Dict[str, Any]: Report of the run.
+    """
+    nodes = sum(result['fixed']['nodes'] for result in results)
+    seconds = sum(result['fixed']['seconds'] for result in results)
+    return {
+        'options': {key: repr(value) for key, value in options.items()},
+        'thinking_time': thinking_time,
+        'results': results,
+        'total': {
+            'nodes': nodes,
+            'seconds': round(seconds, 4),
+            'nps': round(nodes / seconds) if seconds else 0,
+        },
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Compare a report with a baseline report.
+
+    Fixed depth searches are deterministic, so a different node count,
+    move or score is reported, as well as a drop of nodes per second.
+
+    Args:
+        report (Dict[str, Any]): Report of this run.
+        baseline (Dict[str, Any]): Report of a previous run.
+
+    Returns:
+        List[str]: Regressions found.
+    """
+    regressions = []
+    previous = {result['name']: result for result in baseline['results']}
+    for result in report['results']:
+        name = result['name']
+        if name not in previous:
+            continue
+        (curr, prev) = (result['fixed'], previous[name]['fixed'])
+        ratio = curr['nps'] / prev['nps'] if prev['nps'] else 1
+        LOGGER.log(
+            f'{name:<12} nodes {prev["nodes"]:>8} -> {curr["nodes"]:>8} '
+            f'nps {prev["nps"]:>7} -> {curr["nps"]:>7} ({ratio:.2f}x) '
+            f'depth {previous[name]["timed"]["depth"]} -> '
+            f'{result["timed"]["depth"]}',
+        )
+        if curr['depth'] != prev['depth']:
+            continue
+        if (curr['move'], curr['score']) != (prev['move'], prev['score']):
+            regressions.append(
+                f'{name}: best move {prev["move"]} ({prev["score"]}) '
+                f'became {curr["move"]} ({curr["score"]})',
+            )
+        if curr['nodes'] > prev['nodes']:
+            regressions.append(
+                f'{name}: nodes {prev["nodes"]} became {curr["nodes"]}',
+            )
+        if ratio < 1 - NPS_TOLERANCE:
+            regressions.append(f'{name}: nps dropped to {ratio:.2f}x')
+    return regressions
+
+
+def versus(report: Dict[str, Any], other: Dict[str, Any]) -> List[str]:
+    """Show two reports of the same positions side by side.
+
+    Args:
+        report (Dict[str, Any]): Report of the options.
+        other (Dict[str, Any]): Report of the other options.
+
+    Returns:
+        List[str]: A line by position, then totals.
+    """
+    lines = []
+    for (result, contender) in zip(report['results'], other['results']):
+        (fixed, versus_fixed) = (result['fixed'], contender['fixed'])
+        ratio = versus_fixed['nodes'] / fixed['nodes'] if fixed['nodes'] else 1
+        same = 'same score' if fixed['score'] == versus_fixed['score'] else (
+            f'score {fixed["score"]} vs {versus_fixed["score"]}'
+        )
+        lines.append(
+            f'{result["name"]:<12} nodes {fixed["nodes"]:>8} vs '
+            f'{versus_fixed["nodes"]:>8} ({ratio:.2f}x) '
+            f'time {fixed["seconds"]:.3f}s vs {versus_fixed["seconds"]:.3f}s '
+            f'timed depth {result["timed"]["depth"]} vs '
+            f'{contender["timed"]["depth"]}, {same}',
+        )
+    (total, versus_total) = (report['total'], other['total'])
+    lines.append(
+        f'Total: nodes {total["nodes"]} vs {versus_total["nodes"]}, '
+        f'time {total["seconds"]}s vs {versus_total["seconds"]}s',
+    )
+    return lines
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--options', default='',
+        help='options of MinimaxAgent, as option=value,...',
+    )
+    parser.add_argument(
+        '--time', type=float, default=1.0,
+        help='seconds of the fixed time searches',
+    )
+    parser.add_argument(
+        '--positions', nargs='+', metavar='POSITION',
+        choices=[position.name for position in CORPUS],
+        help='names of the positions to run',
+    )
+    parser.add_argument('--output', help='file to write the JSON report to')
+    parser.add_argument('--compare', help='JSON report to compare with')
+    parser.add_argument(
+        '--versus',
+        help='other options to run and show side by side, as option=value,...',
+    )
+    args = parser.parse_args()
+
+    LOGGER.configure(debug=False, perf=False)
+    option_sets = [parse_options(args.options)]
+    if args.versus is not None:
+        option_sets.append({**option_sets[0], **parse_options(args.versus)})
+    reports = run_benchmark(option_sets, args.time, args.positions)
+    report = reports[0]
+    if args.versus is not None:
+        for result in report['results']:
+            LOGGER.log(position_line(result, args.time))
+    LOGGER.log(
+        f'Total: {report["total"]["nodes"]} nodes, '
+        f'{report["total"]["seconds"]}s, {report["total"]["nps"]} nps',
+    )
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    if args.versus is not None:
+        LOGGER.log(f'Versus {args.versus}:')
+        for line in versus(report, reports[1]):
+            LOGGER.log(line)
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(report, json.load(baseline))
+        for regression in regressions:
+            LOGGER.log(f'Regression: {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""BitBoard class definition."""
+from random import shuffle
+from typing import List, Tuple
+
+import numpy as np
+
+from datatypes import Moves, Orientation, Position, Tile
+from GameState import GameState
+from player import Player
+from pseudoboard import PseudoBoard
+
+
+class BitBoard(PseudoBoard):
+    """
+    A PseudoBoard backed by integer bitmasks instead of numpy arrays.
+
+    Marked edges are stored in a single integer (see Layout for the edge
+    indexes) and the squares of each player in one integer per player,
+    so play, revert and openings count are a handful of bit operations.
+    Heuristics are inherited from PseudoBoard.
+    """
+
+    def __init__(self, state: GameState):
+        """Generate new board from game state.
+
+        Args:
+            state (GameState): Game state to infer board from.
+        """
+        super().__init__(state)
+        self.edges = self.layout.edges_of(state)
+        self.boxes: List[int] = [
+            self.layout.boxes_of(state, player.score()) for player in Player
+        ]
+        self.stack: List[Tuple[int, int]] = []
+
+    def __str__(self) -> str:
+        """Return a string representation of the board.
+
+        Returns:
+            str: String representation of the board.
+        """
+        return str(PseudoBoard(self.to_state()))
+
+    def to_state(self) -> GameState:
+        """Build a game state of the current board.
+
+        Returns:
+            GameState: Current game state.
+        """
+        layout = self.layout
+        board_status = np.zeros((layout.rows, layout.cols))
+        row_status = np.zeros((layout.rows + 1, layout.cols))
+        col_status = np.zeros((layout.rows, layout.cols + 1))
+        state = GameState(
+            board_status, row_status, col_status, self.player1_turn,
+        )
+        for idx, (orientation, position) in enumerate(layout.moves):
+            if self.edges >> idx & 1:
+                state.status(orientation)[position] = 1
+        for player in Player:
+            for idx, tile in enumerate(layout.tiles):
+                if self.boxes[player.value] >> idx & 1:
+                    board_status[tile] = player.score()
+        return state
+
+    def play(
+        self,
+        orientation: Orientation,
+        position: Position,
+    ):
+        """Update BitBoard after playing a move.
+
+        Args:
+            orientation (Orientation): Orientation of the move.
+            position (Position): Position of the move.
+        """
+        layout = self.layout
+        idx = layout.edge_index[orientation, position]
+        edges = self.edges | (1 << idx)
+        self.edges = edges
+        self.hash ^= layout.edge_keys[idx]
+        symmetric = self.symmetric
+        if symmetric is not None:
+            symmetric.edge(idx)
+        # Every tile of the edge that is now closed is captured
+        captured = 0
+        box_keys = layout.box_keys[self.player.value]
+        for tile in layout.edge_tiles[idx]:
+            mask = layout.tile_masks[tile]
+            if edges & mask == mask:
+                captured |= 1 << tile
+                self.hash ^= box_keys[tile]
+                if symmetric is not None:
+                    symmetric.box(self.player.value, tile)
+        self.stack.append((idx, captured))
+        # Player can continue if a square is created
+        if captured:
+            self.boxes[self.player.value] |= captured
+        else:
+            self.switch()
+        self.tracker.play(idx)
+
+    def revert(self):
+        """Revert the last move."""
+        layout = self.layout
+        (idx, captured) = self.stack.pop()
+        self.edges ^= 1 << idx
+        self.tracker.revert()
+        self.hash ^= layout.edge_keys[idx]
+        symmetric = self.symmetric
+        if symmetric is not None:
+            symmetric.edge(idx)
+        if captured:
+            self.boxes[self.player.value] ^= captured
+            box_keys = layout.box_keys[self.player.value]
+            for tile in layout.edge_tiles[idx]:
+                if captured >> tile & 1:
+                    self.hash ^= box_keys[tile]
+                    if symmetric is not None:
+                        symmetric.box(self.player.value, tile)
+        else:
+            self.switch()
+
+    def ended(self) -> bool:
+        """Check if the game has ended.
+
+        Returns:
+            bool: True if the game has ended, False otherwise.
+        """
+        return self.edges == self.layout.full
+
+    def squares(self, player: Player) -> int:
+        """Calculate number of squares for a player.
+
+        Args:
+            player (Player): Player to calculate number of squares for.
+
+        Returns:
+            int: Number of squares for the player.
+        """
+        return self.boxes[player.value].bit_count()
+
+    def available_moves(self, randomize=False) -> Moves:
+        """Get all available moves.
+
+        Args:
+            randomize (bool, optional): Randomize move to select.
+                Defaults to False.
+
+        Returns:
+            Moves: List of available moves.
+        """
+        moves = self.layout.moves
+        free = self.layout.full ^ self.edges
+        available: Moves = []
+        while free:
+            low = free & -free
+            available.append(moves[low.bit_length() - 1])
+            free ^= low
+        # If randomize, shuffle moves
+        if randomize:
+            shuffle(available)
+        return available
+
+    def connected(self, tile1: Tile, tile2: Tile) -> bool:
+        """Check if 2 tiles are connected.
+
+        Two different tiles is connected if they has common open row/col.
+
+        Args:
+            tile1 (Tile): First tile.
+            tile2 (Tile): Second tile.
+
+        Returns:
+            bool: True if 2 tiles are connected, False otherwise.
+        """
+        (a, b) = tile1
+        (c, d) = tile2
+        if abs(c - a) + abs(d - b) != 1:
+            return False
+        if a == c:
+            edge = ('col', (a, max(b, d)))
+        else:
+            edge = ('row', (max(a, c), b))
+        return not self.edges >> self.layout.edge_index[edge] & 1
+
+    def openings_count(self, tile: Tile) -> int:
+        """Count number of openings in a tile.
+
+        Args:
+            tile (Tile): Tile to count openings.
+
+        Returns:
+            int: Number of openings in a tile.
+        """
+        layout = self.layout
+        mask = layout.tile_masks[tile[0] * layout.cols + tile[1]]
+        return 4 - (self.edges & mask).bit_count()
+
+    def edge_openings(
+        self,
+        orientation: Orientation,
+        position: Position,
+    ) -> List[int]:
+        """Count number of openings in the tiles sharing an edge.
+
+        Args:
+            orientation (Orientation): Orientation of the edge.
+            position (Position): Position of the edge.
+
+        Returns:
+            List[int]: Number of openings of each tile of the edge.
+        """
+        layout = self.layout
+        edges = self.edges
+        return [
+            4 - (edges & layout.tile_masks[tile]).bit_count()
+            for tile in layout.edge_tiles[layout.edge_index[
+                orientation, position
+            ]]
+        ]
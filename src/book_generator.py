@@ -0,0 +1,141 @@
+"""Opening book generator.
+
+Every position reachable from the empty board within some moves is
+reduced by symmetry, searched at a fixed depth, and written to a book.
+
+Generate the book of the default board with:
+    python book_generator.py --size 3 3 --plies 3 --depth 6
+"""
+import argparse
+import os
+from typing import List
+
+from datatypes import Move
+from game import HeadlessGame
+from GameAction import GameAction
+from GameState import GameState
+from layout import get_layout
+from logger import LOGGER
+from minimax_agent import MinimaxAgent
+from opening_book import Record, book_path, write_book
+from symmetry import get_symmetries
+
+# Time limit of a position, the fixed depth search should end before
+SEARCH_TIME = 600.0
+
+
+def make_state(rows: int, cols: int, edges: int) -> GameState:
+    """Build the game state of marked edges, player 1 to move.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+        edges (int): Bitmask of marked edges.
+
+    Returns:
+        GameState: The game state.
+    """
+    layout = get_layout(rows, cols)
+    game = HeadlessGame(rows, cols)
+    for idx, (orientation, position) in enumerate(layout.moves):
+        if edges >> idx & 1:
+            game.play(GameAction(orientation, position[::-1]))
+    game.player1_turn = True
+    return game.state()
+
+
+def book_positions(rows: int, cols: int, plies: int) -> List[int]:
+    """List canonical positions reachable within some moves.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+        plies (int): Number of moves from the empty board.
+
+    Returns:
+        List[int]: Canonical edges bitmasks, sorted.
+    """
+    layout = get_layout(rows, cols)
+    symmetries = get_symmetries(rows, cols)
+    found = {0}
+    ply = {0}
+    for _ in range(plies):
+        ply = {
+            symmetries.canonical(edges | 1 << idx)[0]
+            for edges in ply
+            for idx in range(layout.edge_count)
+            if not edges >> idx & 1
+        }
+        found |= ply
+    return sorted(found)
+
+
+def search_position(
+    rows: int,
+    cols: int,
+    edges: int,
+    depth: int,
+    thinking_time: float = SEARCH_TIME,
+) -> Record:
+    """Search a position of the book.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+        edges (int): Canonical edges bitmask.
+        depth (int): Depth to search.
+        thinking_time (float, optional): Time limit of the search.
+            Defaults to SEARCH_TIME.
+
+    Returns:
+        Record: The record of the position.
+    """
+    layout = get_layout(rows, cols)
+    agent = MinimaxAgent(make_state(rows, cols, edges), depth=depth)
+    agent.thinking_time = thinking_time
+    (move, score) = agent.search()
+    idx = layout.edge_index[Move(move.orientation, move.position[::-1])]
+    score -= agent.board.utility(agent.player)
+    return (edges, idx, max(-128, min(127, round(score))))
+
+
+def main():
+    """Generate an opening book from the command line."""
+    parser = argparse.ArgumentParser(description='Generate an opening book.')
+    parser.add_argument(
+        '--size', type=int, nargs=2, default=(3, 3), metavar=('ROWS', 'COLS'),
+        help='number of box rows and columns',
+    )
+    parser.add_argument(
+        '--plies', type=int, default=2, help='moves from the empty board',
+    )
+    parser.add_argument(
+        '--depth', type=int, default=6, help='depth to search positions',
+    )
+    parser.add_argument(
+        '--time', type=float, default=SEARCH_TIME,
+        help='time limit of a position search',
+    )
+    parser.add_argument('--output', help='path of the book file')
+    args = parser.parse_args()
+    (rows, cols) = args.size
+    if get_layout(rows, cols).edge_count > 64:
+        parser.error('boards of more than 64 lines are not supported')
+
+    LOGGER.configure(debug=False, perf=False)
+    positions = book_positions(rows, cols, args.plies)
+    records = []
+    for idx, edges in enumerate(positions):
+        records.append(search_position(
+            rows, cols, edges, args.depth, args.time,
+        ))
+        LOGGER.log(f'[{idx + 1}/{len(positions)}] {edges:#x}: {records[-1]}')
+
+    path = args.output or book_path(rows, cols)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_book(path, rows, cols, records)
+    LOGGER.log(f'Wrote {len(records)} positions to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Captures leaving no choice, and the only moves worth a choice.
+
+A box with three sides can be taken by drawing its last side. When that
+side does not give a third side to a neighbor with two, taking the box
+changes nothing else, and it is at least as good as any other move
+(Barker & Korf, Solving Dots-And-Boxes, 2012).
+
+Otherwise the box is the end of a chain being taken, and only two kinds
+of moves are worth searching: taking it, or drawing the far side of the
+next box, which leaves both boxes to the opponent to keep control
+(all-but-two, double dealing).
+"""
+from typing import List, Optional
+
+from chains import ChainTracker
+
+
+def open_edge(tracker: ChainTracker, tile: int) -> int:
+    """Get the first open side of a tile.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+        tile (int): Index of the tile.
+
+    Returns:
+        int: Index of the edge.
+    """
+    return next(
+        edge
+        for edge in tracker.layout.tile_edges[tile]
+        if not tracker.edges >> edge & 1
+    )
+
+
+def across(tracker: ChainTracker, edge: int, tile: int) -> Optional[int]:
+    """Get the tile on the other side of an edge.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+        edge (int): Index of the edge.
+        tile (int): Index of the tile on one side.
+
+    Returns:
+        Optional[int]: The other tile, None on the border.
+    """
+    for other in tracker.layout.edge_tiles[edge]:
+        if other != tile:
+            return other
+    return None
+
+
+def safe_capture(tracker: ChainTracker) -> Optional[int]:
+    """Get an edge taking a box without a choice to make.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+
+    Returns:
+        Optional[int]: Index of the edge, None if there is none.
+    """
+    if not tracker.tally[1]:
+        return None
+    opens = tracker.opens
+    for (tile, count) in enumerate(opens):
+        if count != 1:
+            continue
+        edge = open_edge(tracker, tile)
+        other = across(tracker, edge, tile)
+        if other is None or opens[other] != 2:
+            return edge
+    return None
+
+
+def capture_moves(tracker: ChainTracker) -> Optional[List[int]]:
+    """Get the only moves worth searching when a box can be taken.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+
+    Returns:
+        Optional[List[int]]: Indexes of the edges, a safe capture alone
+            if there is one, None if no box can be taken.
+    """
+    if not tracker.tally[1]:
+        return None
+    safe = safe_capture(tracker)
+    if safe is not None:
+        return [safe]
+    edges = set()
+    for (tile, count) in enumerate(tracker.opens):
+        if count != 1:
+            continue
+        # The next box has two open sides, this one and the far one
+        edge = open_edge(tracker, tile)
+        other = across(tracker, edge, tile)
+        edges.add(edge)
+        edges.update(
+            far
+            for far in tracker.layout.tile_edges[other]
+            if far != edge and not tracker.edges >> far & 1
+        )
+    return sorted(edges)
@@ -0,0 +1,242 @@
+"""Incremental chain and loop tracking."""
+from typing import List, Optional, Tuple
+
+from datatypes import Component, Counts
+from layout import Layout
+
+# Indexes of the chain counters
+FREE = 0
+LOOPS = 1
+NOSCS = 2
+OSCS = 3
+HOSCS = 4
+LEN_HOSCS = 5
+OLCS = 6
+LEN_OLCS = 7
+NOLCS = 8
+COUNTERS = 9
+
+History = Tuple[int, List[Component], List[Component]]
+
+
+class ChainTracker(object):
+    """
+    A class to keep chains and loops of a board up to date.
+
+    Tiles with 1 or 2 openings are chainable, and two adjacent chainable
+    tiles are linked if their common row/col is open. Every chainable tile
+    has at most two links, so linked tiles form paths (chains) or cycles
+    (loops), called components.
+
+    An edge only changes the openings of its (at most two) tiles, so only
+    components of those tiles (and of their neighbors, when a tile becomes
+    chainable) are rebuilt when an edge is played, and restored as they
+    were when it is reverted. Counters summarizing the
+    components, used by the heuristics, are updated along the way.
+    """
+
+    def __init__(self, layout: Layout, edges: int):
+        """Build components of a board.
+
+        Args:
+            layout (Layout): Layout of the board.
+            edges (int): Bitmask of marked edges.
+        """
+        self.layout = layout
+        self.edges = edges
+        self.opens: List[int] = [
+            4 - (edges & mask).bit_count() for mask in layout.tile_masks
+        ]
+        # Number of tiles by openings count
+        self.tally: List[int] = [0] * 5
+        for opens in self.opens:
+            self.tally[opens] += 1
+        self.components: List[Optional[Component]] = [None] * layout.size
+        self.counters: List[int] = [0] * COUNTERS
+        self.history: List[History] = []
+        for tile in range(layout.size):
+            if self.components[tile] is None and 0 < self.opens[tile] < 3:
+                self.add(self.expand(tile))
+
+    def play(self, edge: int):
+        """Update components after marking an edge.
+
+        Args:
+            edge (int): Index of the marked edge.
+        """
+        layout = self.layout
+        components = self.components
+        tiles = layout.edge_tiles[edge]
+
+        # Remove components of the tiles of the edge. A tile turning
+        # chainable (3 to 2 openings) may also link its neighbors,
+        # remove their components as well
+        removed: List[Component] = []
+        touched = list(tiles)
+        for tile in tiles:
+            if self.opens[tile] == 3:
+                for (neighbor, other) in layout.neighbors[tile]:
+                    if not self.edges >> other & 1:
+                        touched.append(neighbor)
+        for tile in touched:
+            component = components[tile]
+            if component is not None:
+                self.remove(component)
+                removed.append(component)
+                touched.extend(component.tiles)
+
+        self.edges |= 1 << edge
+        for tile in tiles:
+            self.tally[self.opens[tile]] -= 1
+            self.opens[tile] -= 1
+            self.tally[self.opens[tile]] += 1
+
+        # Rebuild components of the touched tiles
+        added: List[Component] = []
+        for tile in touched:
+            if components[tile] is None and 0 < self.opens[tile] < 3:
+                component = self.expand(tile)
+                self.add(component)
+                added.append(component)
+        self.history.append((edge, removed, added))
+
+    def revert(self):
+        """Restore components before the last marked edge."""
+        (edge, removed, added) = self.history.pop()
+        self.edges ^= 1 << edge
+        for tile in self.layout.edge_tiles[edge]:
+            self.tally[self.opens[tile]] -= 1
+            self.opens[tile] += 1
+            self.tally[self.opens[tile]] += 1
+        for component in added:
+            self.remove(component)
+        for component in removed:
+            self.add(component)
+
+    def add(self, component: Component):
+        """Add a component and its counters.
+
+        Args:
+            component (Component): Component to add.
+        """
+        for tile in component.tiles:
+            self.components[tile] = component
+        for idx, count in component.counters:
+            self.counters[idx] += count
+
+    def remove(self, component: Component):
+        """Remove a component and its counters.
+
+        Args:
+            component (Component): Component to remove.
+        """
+        for tile in component.tiles:
+            self.components[tile] = None
+        for idx, count in component.counters:
+            self.counters[idx] -= count
+
+    def links(self, tile: int) -> List[int]:
+        """Get chainable neighbors sharing an open row/col with a tile.
+
+        Args:
+            tile (int): Index of the tile.
+
+        Returns:
+            List[int]: Indexes of the linked tiles.
+        """
+        edges = self.edges
+        opens = self.opens
+        return [
+            neighbor
+            for (neighbor, edge) in self.layout.neighbors[tile]
+            if not edges >> edge & 1 and 0 < opens[neighbor] < 3
+        ]
+
+    def expand(self, start: int) -> Component:
+        """Expand the component of a chainable tile.
+
+        Args:
+            start (int): Index of the tile.
+
+        Returns:
+            Component: The component, tiles ordered from one end to the other.
+        """
+        links = self.links(start)
+        tiles = [start]
+        loop = False
+        if links:
+            (forward, loop) = self.follow(start, links[0])
+            tiles.extend(forward)
+            if not loop and len(links) > 1:
+                (backward, _) = self.follow(start, links[1])
+                tiles = backward[::-1] + tiles
+        return Component(tuple(tiles), loop, self.count(tiles, loop))
+
+    def follow(self, start: int, tile: int) -> Tuple[List[int], bool]:
+        """Follow links from a tile, away from start.
+
+        Args:
+            start (int): Index of the tile to walk away from.
+            tile (int): Index of the first tile of the walk.
+
+        Returns:
+            Tuple[List[int], bool]: Walked tiles, and whether the walk came
+                back to start (a loop).
+        """
+        path = []
+        prev = start
+        while tile != start:
+            path.append(tile)
+            nexts = [link for link in self.links(tile) if link != prev]
+            if not nexts:
+                return (path, False)
+            (prev, tile) = (tile, nexts[0])
+        return (path, True)
+
+    def count(self, tiles: List[int], loop: bool) -> Counts:
+        """Get the counters of a component.
+
+        Args:
+            tiles (List[int]): Tiles of the component, in order.
+            loop (bool): Whether the component is a loop.
+
+        Returns:
+            Counts: Pairs of (counter index, count).
+        """
+        length = len(tiles)
+        if length == 1:
+            return ((FREE, 1),) if self.opens[tiles[0]] == 1 else ()
+        if loop:
+            return ((LOOPS, length),)
+        ends = (self.opens[tiles[0]] == 2) + (self.opens[tiles[-1]] == 2)
+        if length == 2:
+            if ends == 2:
+                return ((OSCS, length),)
+            elif ends == 1:
+                return ((HOSCS, length), (LEN_HOSCS, 1))
+            return ((NOSCS, length),)
+        if ends == 2:
+            return ((OLCS, length), (LEN_OLCS, 1))
+        return ((NOLCS, length),)
+
+    def groups(self, loop: bool) -> List[Component]:
+        """Get distinct components of two or more tiles.
+
+        Args:
+            loop (bool): Get loops if True, chains otherwise.
+
+        Returns:
+            List[Component]: Components, ordered by their first tile.
+        """
+        found = []
+        seen = set()
+        for component in self.components:
+            if (
+                component is not None and
+                len(component.tiles) >= 2 and
+                component.loop == loop and
+                id(component) not in seen
+            ):
+                seen.add(id(component))
+                found.append(component)
+        return found
@@ -1,9 +1,11 @@
 """Custom data types for the application."""
+from enum import Enum
 from typing import List, Literal, NamedTuple, Tuple
 
 from player import Player
 
 Orientation = Literal['row', 'col']
+Engine = Literal['numpy', 'bitboard']
 Tile = Tuple[int, int]
 Tiles = List[Tile]
 
@@ -36,6 +38,43 @@ class Eval(NamedTuple):
     score: int
 
 
+class Bound(Enum):
+    """Kind of score stored in the transposition table."""
+
+    exact = 0
+    lower = 1
+    upper = 2
+
+
+class TableEntry(NamedTuple):
+    """Transposition table entry."""
+
+    key: int
+    depth: int
+    score: int
+    bound: Bound
+    move: Move
+    generation: int
+
+
+class BookEntry(NamedTuple):
+    """Opening book answer: best move and score to come for the mover."""
+
+    move: Move
+    score: int
+
+
+Counts = Tuple[Tuple[int, int], ...]
+
+
+class Component(NamedTuple):
+    """Chain or loop of linked tiles, tiles given by index."""
+
+    tiles: Tuple[int, ...]
+    loop: bool
+    counters: Counts
+
+
 Flag = List[bool]
 Flags = List[List[bool]]
 Chain = List[Tile]
@@ -0,0 +1,89 @@
+"""Time limits of searches, checked by the search itself.
+
+A search calls Deadline.check at every node, and the monotonic clock is
+only read every CHECK_INTERVAL calls. Past the hard limit, check raises
+SearchTimeout, which unwinds the recursion at once. Iterative deepening
+does not start a new iteration past the soft limit, as it would most
+likely be cut and discarded.
+"""
+from time import monotonic
+
+# Nodes between two reads of the clock
+CHECK_INTERVAL = 16
+# Part of the time after which no new iteration is started
+SOFT_RATIO = 0.5
+
+
+class SearchTimeout(Exception):
+    """Raised at a node checked past the hard limit."""
+
+
+class Deadline(object):
+    """Hard and soft time limits of a search."""
+
+    def __init__(
+        self,
+        seconds: float,
+        soft_ratio: float = SOFT_RATIO,
+        interval: int = CHECK_INTERVAL,
+    ):
+        """Start the clock.
+
+        Args:
+            seconds (float): Time until the hard limit.
+            soft_ratio (float, optional): Part of the time until the soft
+                limit. Defaults to SOFT_RATIO.
+            interval (int, optional): Checks between two reads of the
+                clock. Defaults to CHECK_INTERVAL.
+        """
+        self.start = monotonic()
+        self.hard = self.start + seconds
+        self.soft = self.start + seconds * soft_ratio
+        self.interval = interval
+        # A search given no time stops at its first check
+        self.countdown = interval if seconds > 0 else 1
+        self.stopped = False
+
+    def check(self):
+        """Count a node, and stop the search past the hard limit.
+
+        Raises:
+            SearchTimeout: If the search is stopped.
+        """
+        self.countdown -= 1
+        if self.countdown > 0:
+            return
+        self.countdown = self.interval
+        if self.expired():
+            raise SearchTimeout()
+
+    def expired(self) -> bool:
+        """Check the hard limit now.
+
+        Returns:
+            bool: True if the search is stopped.
+        """
+        if not self.stopped and monotonic() >= self.hard:
+            self.stopped = True
+        return self.stopped
+
+    def soft_expired(self) -> bool:
+        """Check the soft limit now.
+
+        Returns:
+            bool: True if no new iteration should be started.
+        """
+        return self.stopped or monotonic() >= self.soft
+
+    def elapsed(self) -> float:
+        """Get the time since the start.
+
+        Returns:
+            float: Seconds elapsed.
+        """
+        return monotonic() - self.start
+
+    def stop(self):
+        """Stop the search at its next check, from any thread."""
+        self.stopped = True
+        self.countdown = 1
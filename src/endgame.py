@@ -0,0 +1,196 @@
+"""Exact solver of endgames made of chains and loops.
+
+Once every box left has exactly two openings, the board is a set of
+independent chains and loops, and the player to move has to open one of
+them. The opponent then either takes all of its boxes and has to open
+the next one, or keeps control by declining the last two boxes of a
+chain (four of a loop), which the player takes before opening the next
+one. A chain of two is opened in the middle, so it cannot be declined.
+
+With V the value of the remaining components for the player to move:
+    chain of 1 or 2 boxes: -(c + V)
+    longer chain:          min(-(c + V), 4 - c + V)
+    loop:                  min(-(l + V), 8 - l + V)
+and the player opens the component of highest value.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from chains import ChainTracker
+from datatypes import Component, Move
+from pseudoboard import PseudoBoard
+
+# Sorted lengths of chains or loops
+Lengths = Tuple[int, ...]
+
+
+def is_simple(tracker: ChainTracker) -> bool:
+    """Check if every box left has exactly two openings.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+
+    Returns:
+        bool: True if the board is made of chains and loops only.
+    """
+    tally = tracker.tally
+    return tally[2] > 0 and not (tally[1] or tally[3] or tally[4])
+
+
+def components_of(tracker: ChainTracker) -> List[Component]:
+    """Get distinct components of a board, single boxes included.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+
+    Returns:
+        List[Component]: Components, ordered by their first tile.
+    """
+    found: Dict[int, Component] = {}
+    for component in tracker.components:
+        if component is not None:
+            found.setdefault(id(component), component)
+    return list(found.values())
+
+
+def lengths_of(components: List[Component]) -> Tuple[Lengths, Lengths]:
+    """Get sorted lengths of chains and loops.
+
+    Args:
+        components (List[Component]): Components of a board.
+
+    Returns:
+        Tuple[Lengths, Lengths]: Lengths of chains and of loops.
+    """
+    chains = sorted(len(part.tiles) for part in components if not part.loop)
+    loops = sorted(len(part.tiles) for part in components if part.loop)
+    return (tuple(chains), tuple(loops))
+
+
+def remove(lengths: Lengths, length: int) -> Lengths:
+    """Remove one component of a length.
+
+    Args:
+        lengths (Lengths): Sorted lengths.
+        length (int): Length to remove.
+
+    Returns:
+        Lengths: Sorted lengths without it.
+    """
+    idx = lengths.index(length)
+    return lengths[:idx] + lengths[idx + 1:]
+
+
+def openings(chains: Lengths, loops: Lengths) -> List[Tuple[bool, int, int]]:
+    """Get the value of opening every distinct component.
+
+    Args:
+        chains (Lengths): Lengths of chains.
+        loops (Lengths): Lengths of loops.
+
+    Returns:
+        List[Tuple[bool, int, int]]: Whether it is a loop, its length,
+            and the value for the player to move.
+    """
+    values = []
+    for length in sorted(set(chains)):
+        rest = solve(remove(chains, length), loops)
+        value = -(length + rest)
+        if length >= 3:
+            value = min(value, 4 - length + rest)
+        values.append((False, length, value))
+    for length in sorted(set(loops)):
+        rest = solve(chains, remove(loops, length))
+        values.append((True, length, min(-(length + rest), 8 - length + rest)))
+    return values
+
+
+@lru_cache(maxsize=None)
+def solve(chains: Lengths, loops: Lengths) -> int:
+    """Get the value of chains and loops for the player to move.
+
+    Args:
+        chains (Lengths): Sorted lengths of chains.
+        loops (Lengths): Sorted lengths of loops.
+
+    Returns:
+        int: Boxes of the player minus boxes of the opponent, to come.
+    """
+    if not chains and not loops:
+        return 0
+    return max(value for (_, _, value) in openings(chains, loops))
+
+
+def solve_board(board: PseudoBoard) -> Optional[int]:
+    """Get the exact value of a board for the player to move.
+
+    Args:
+        board (PseudoBoard): The board.
+
+    Returns:
+        Optional[int]: Boxes of the player minus boxes of the opponent,
+            to come, or None if the board is not made of chains and loops.
+    """
+    if not is_simple(board.tracker):
+        return None
+    return solve(*lengths_of(components_of(board.tracker)))
+
+
+def endgame_move(board: PseudoBoard) -> Optional[Move]:
+    """Get the best move of a board made of chains and loops.
+
+    Args:
+        board (PseudoBoard): The board.
+
+    Returns:
+        Optional[Move]: The move, or None if the board is not made of
+            chains and loops.
+    """
+    tracker = board.tracker
+    if not is_simple(tracker):
+        return None
+    components = components_of(tracker)
+    (loop, length, _) = max(
+        openings(*lengths_of(components)),
+        key=lambda opening: opening[2],
+    )
+    component = next(
+        part
+        for part in components
+        if part.loop == loop and len(part.tiles) == length
+    )
+    return board.layout.moves[opening_edge(tracker, component)]
+
+
+def opening_edge(tracker: ChainTracker, component: Component) -> int:
+    """Get the edge to open a component with.
+
+    A chain is opened at an end, a chain of two in the middle so that it
+    cannot be declined, and a loop anywhere.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+        component (Component): The component.
+
+    Returns:
+        int: Index of the edge.
+    """
+    tiles = component.tiles
+    if len(tiles) == 1:
+        return next(
+            edge
+            for edge in tracker.layout.tile_edges[tiles[0]]
+            if not tracker.edges >> edge & 1
+        )
+    link = next(
+        edge
+        for (neighbor, edge) in tracker.layout.neighbors[tiles[0]]
+        if neighbor == tiles[1]
+    )
+    if component.loop or len(tiles) == 2:
+        return link
+    return next(
+        edge
+        for edge in tracker.layout.tile_edges[tiles[0]]
+        if edge != link and not tracker.edges >> edge & 1
+    )
@@ -0,0 +1,140 @@
+"""Classes of moves leading to the same value.
+
+The value of a position only depends on how boxes are joined by open
+lines, boxes as nodes and lines as links, the border being one more node
+(strings and coins, Berlekamp 2000). A chain or loop whose open lines all
+stay inside it or go to the border is cut off from the rest of the board,
+and mapping the graph onto itself gives moves of the same value:
+    - a loop can be turned, so all of its lines are alike;
+    - a chain ending on the border at both sides can be flipped, so its
+      i-th line from one end is alike the i-th line from the other end;
+    - two cut off chains (or loops) of the same length can be swapped, so
+      their lines are alike position by position.
+Lines of every other part of the board are only alike themselves. Only
+one move of every class needs to be searched.
+"""
+from typing import Dict, Hashable, List
+
+from chains import ChainTracker
+from datatypes import Component, Moves
+
+
+def isolated(tracker: ChainTracker, component: Component) -> bool:
+    """Check if the open lines of a component stay inside it or go out.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+        component (Component): A chain or loop of the board.
+
+    Returns:
+        bool: True if every box has two openings, each shared with a box
+            of the component or on the border.
+    """
+    opens = tracker.opens
+    layout = tracker.layout
+    for tile in component.tiles:
+        if opens[tile] != 2:
+            return False
+        for (neighbor, edge) in layout.neighbors[tile]:
+            # Boxes of two openings sharing an open line are linked
+            if not tracker.edges >> edge & 1 and opens[neighbor] != 2:
+                return False
+    return True
+
+
+def component_keys(
+    tracker: ChainTracker,
+    component: Component,
+) -> Dict[int, Hashable]:
+    """Get the class of every open line of a cut off component.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+        component (Component): A cut off chain or loop.
+
+    Returns:
+        Dict[int, Hashable]: Class of every line, by edge index.
+    """
+    layout = tracker.layout
+    tiles = component.tiles
+    length = len(tiles)
+    order = {tile: idx for (idx, tile) in enumerate(tiles)}
+    keys: Dict[int, Hashable] = {}
+    for (idx, tile) in enumerate(tiles):
+        for edge in layout.tile_edges[tile]:
+            if tracker.edges >> edge & 1 or edge in keys:
+                continue
+            if component.loop:
+                keys[edge] = ('loop', length)
+                continue
+            # Lines are numbered 0 to length along the chain
+            sides = [order[side] for side in layout.edge_tiles[edge]]
+            if len(sides) == 2:
+                position = max(sides)
+            else:
+                position = 0 if idx == 0 else length
+            keys[edge] = ('chain', length, min(position, length - position))
+    return keys
+
+
+def move_keys(tracker: ChainTracker) -> Dict[int, Hashable]:
+    """Get the class of every open line of cut off components.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+
+    Returns:
+        Dict[int, Hashable]: Class of every line, by edge index. Lines of
+            other parts of the board are left out.
+    """
+    keys: Dict[int, Hashable] = {}
+    seen = set()
+    for component in tracker.components:
+        if component is None or id(component) in seen:
+            continue
+        seen.add(id(component))
+        if isolated(tracker, component):
+            keys.update(component_keys(tracker, component))
+    return keys
+
+
+def move_classes(tracker: ChainTracker) -> List[List[int]]:
+    """Group open lines by class.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+
+    Returns:
+        List[List[int]]: Edge indexes of every class, ordered by edge.
+    """
+    keys = move_keys(tracker)
+    classes: Dict[Hashable, List[int]] = {}
+    for edge in range(tracker.layout.edge_count):
+        if not tracker.edges >> edge & 1:
+            classes.setdefault(keys.get(edge, edge), []).append(edge)
+    return list(classes.values())
+
+
+def distinct_moves(tracker: ChainTracker, moves: Moves) -> Moves:
+    """Keep the first move of every class.
+
+    Args:
+        tracker (ChainTracker): Chains of the board.
+        moves (Moves): Moves to reduce, in search order.
+
+    Returns:
+        Moves: Moves left, in the same order.
+    """
+    keys = move_keys(tracker)
+    if not keys:
+        return moves
+    edge_index = tracker.layout.edge_index
+    seen = set()
+    distinct: Moves = []
+    for move in moves:
+        edge = edge_index[move]
+        key = keys.get(edge, edge)
+        if key not in seen:
+            seen.add(key)
+            distinct.append(move)
+    return distinct
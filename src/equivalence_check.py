@@ -0,0 +1,205 @@
+"""Check that searching one move of every class gives the same values.
+
+Two checks are run, and the script exits with an error on any mismatch:
+    - exact: on random positions of small boards, every move of a class
+      is valued the same by the perfect solver, and the best of the moves
+      kept is the value of the position;
+    - search: positions of the benchmark corpus, and positions replayed
+      from more seeded games, are searched at a fixed depth by
+      MinimaxAgent and by LocalSearchAgent, with and without classes, and
+      both searches must find the same score.
+
+The tests run both checks on a few positions; this script is the larger
+sweep, to run by hand after changing the classes.
+
+Examples:
+    python equivalence_check.py
+    python equivalence_check.py --sizes 2 3 3 3 --samples 50000
+"""
+import argparse
+import sys
+from random import Random
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from benchmark import CORPUS, Position, fixed_agent, make_state
+from chains import ChainTracker
+from equivalence import move_classes
+from layout import Layout, get_layout
+from local_search_agent import LocalSearchAgent
+from logger import LOGGER
+from perfect_agent import get_solution
+from player import Player
+
+# Seeded games replayed on top of the corpus
+EXTRA_GAMES = 12
+
+
+def child_value(
+    layout: Layout,
+    values: np.ndarray,
+    edges: int,
+    edge: int,
+) -> int:
+    """Value a move with the perfect solution.
+
+    Args:
+        layout (Layout): Layout of the board.
+        values (np.ndarray): Value of every edges bitmask.
+        edges (int): Bitmask of marked edges.
+        edge (int): Index of the edge played.
+
+    Returns:
+        int: Value of the move for the player to move.
+    """
+    child = edges | 1 << edge
+    captured = sum(
+        child & layout.tile_masks[tile] == layout.tile_masks[tile]
+        for tile in layout.edge_tiles[edge]
+    )
+    value = int(values[child])
+    return captured + value if captured else -value
+
+
+def check_exact(rows: int, cols: int, samples: int, seed: int) -> int:
+    """Check classes against the perfect solution of a board size.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+        samples (int): Random positions to check.
+        seed (int): Seed of the positions.
+
+    Returns:
+        int: Number of mismatches.
+    """
+    layout = get_layout(rows, cols)
+    values = get_solution(rows, cols)
+
+    rng = Random(seed)
+    (mismatches, merged) = (0, 0)
+    for _ in range(samples):
+        edges = rng.getrandbits(layout.edge_count)
+        if edges == layout.full:
+            continue
+        classes = move_classes(ChainTracker(layout, edges))
+        kept = []
+        for moves in classes:
+            found = {
+                child_value(layout, values, edges, edge) for edge in moves
+            }
+            if len(found) > 1:
+                mismatches += 1
+                LOGGER.log(f'{rows}x{cols} {edges:#x}: class {moves} {found}')
+            merged += len(moves) - 1
+            kept.append(max(found))
+        if max(kept) != values[edges]:
+            mismatches += 1
+            LOGGER.log(f'{rows}x{cols} {edges:#x}: value {max(kept)}')
+    LOGGER.log(
+        f'exact {rows}x{cols}: {samples} positions, {merged} moves merged, '
+        f'{mismatches} mismatches',
+    )
+    return mismatches
+
+
+def positions() -> Iterator[Position]:
+    """Get the corpus, then positions of more seeded games.
+
+    Yields:
+        Position: A position to search.
+    """
+    yield from CORPUS
+    rng = Random(0)
+    for seed in range(EXTRA_GAMES):
+        (rows, cols) = rng.choice(((3, 3), (3, 4), (4, 4)))
+        edges = 2 * rows * cols + rows + cols
+        moves = rng.randint(edges // 2, edges - 4)
+        yield Position(f'game-{seed}', rows, cols, moves, 100 + seed, 6)
+
+
+def search_scores(position: Position) -> Tuple[List[float], List[int]]:
+    """Search a position with and without classes.
+
+    Args:
+        position (Position): The position.
+
+    Returns:
+        Tuple[List[float], List[int]]: Minimax and local search scores,
+            then minimax nodes, without classes first.
+    """
+    state = make_state(position)
+    (scores, nodes) = ([], [])
+    for equivalence in (False, True):
+        agent = fixed_agent(
+            state, position.depth, {'equivalence': equivalence},
+        )
+        (_, score) = agent.search()
+        scores.append(float(score))
+        nodes.append(agent.evaluated)
+    for equivalence in (False, True):
+        agent = LocalSearchAgent(
+            state,
+            Player.of(state.player1_turn),
+            batch=False,
+            equivalence=equivalence,
+        )
+        (_, score) = agent.search()
+        scores.append(float(score))
+    return (scores, nodes)
+
+
+def check_search() -> int:
+    """Check searches with classes on the positions.
+
+    Returns:
+        int: Number of mismatches.
+    """
+    mismatches = 0
+    for position in positions():
+        (scores, nodes) = search_scores(position)
+        same = scores[0] == scores[1] and scores[2] == scores[3]
+        mismatches += not same
+        LOGGER.log(
+            f'{position.name:<12} depth {position.depth}: '
+            f'minimax {scores[0]} vs {scores[1]}, '
+            f'local {scores[2]} vs {scores[3]}, '
+            f'nodes {nodes[0]:>7} vs {nodes[1]:>7}'
+            f'{"" if same else "  MISMATCH"}',
+        )
+    LOGGER.log(f'search: {mismatches} mismatches')
+    return mismatches
+
+
+def main():
+    """Run the checks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[2, 2, 2, 3],
+        help='board sizes of the exact check, as rows cols ...',
+    )
+    parser.add_argument(
+        '--samples', type=int, default=20000,
+        help='random positions of every board size',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--skip-search', action='store_true',
+        help='only run the exact check',
+    )
+    args = parser.parse_args()
+
+    LOGGER.configure(debug=False, perf=False)
+    mismatches = 0
+    sizes = args.sizes
+    for (rows, cols) in zip(sizes[::2], sizes[1::2]):
+        mismatches += check_exact(rows, cols, args.samples, args.seed)
+    if not args.skip_search:
+        mismatches += check_search()
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Evaluation cache definition."""
+from collections import OrderedDict
+from typing import Tuple
+
+from layout import Layout
+from player import Player
+from pseudoboard import PseudoBoard
+
+EVAL_CACHE_SIZE = 1 << 16
+
+# Layout, Zobrist hash of the board, evaluated player and use of heuristics
+CacheKey = Tuple[Layout, int, Player, bool]
+
+
+class EvalCache(object):
+    """
+    A bounded cache of board evaluations.
+
+    Leaves are evaluated again and again, reached through other move
+    orders, by the next iteration of a deepening search or by the next
+    turn. The Zobrist hash of a board covers its lines, boxes and side to
+    move, so it decides the evaluation for a player. Entries are kept in
+    use order, and the least recently used is evicted when full.
+    """
+
+    def __init__(self, size: int = EVAL_CACHE_SIZE):
+        """Initialize an empty cache.
+
+        Args:
+            size (int, optional): Number of entries. Defaults to
+                EVAL_CACHE_SIZE.
+        """
+        self.size = size
+        self.entries: OrderedDict[CacheKey, int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """Count entries.
+
+        Returns:
+            int: Number of entries.
+        """
+        return len(self.entries)
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def objective(
+        self,
+        board: PseudoBoard,
+        player: Player,
+        use_eval=False,
+    ) -> int:
+        """Get the objective value of a board, evaluated once.
+
+        Args:
+            board (PseudoBoard): The board.
+            player (Player): Player to calculate objective value for.
+            use_eval (bool, optional): Use heuristics. Defaults to False.
+
+        Returns:
+            int: Objective value of the board for the player.
+        """
+        key = (board.layout, board.hash, player, use_eval)
+        entries = self.entries
+        value = entries.get(key)
+        if value is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return value
+
+        self.misses += 1
+        value = board.objective(player, use_eval)
+        entries[key] = value
+        if len(entries) > self.size:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def hit_rate(self) -> float:
+        """Get the share of lookups found in the cache.
+
+        Returns:
+            float: Hits over lookups, 0 if none.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> str:
+        """Summarize the use of the cache.
+
+        Returns:
+            str: Hits, misses, hit rate, evictions and fill.
+        """
+        return (
+            f'Eval cache: {self.hits} hits, {self.misses} misses, '
+            f'{self.hit_rate():.1%} hit rate, {self.evictions} evictions, '
+            f'{len(self)}/{self.size} entries'
+        )
@@ -0,0 +1,118 @@
+"""Headless game engine."""
+from typing import Tuple
+
+import numpy as np
+
+from GameAction import GameAction
+from GameState import GameState
+
+
+class HeadlessGame(object):
+    """
+    A game of Dots and Boxes without user interface.
+
+    Follows the same rules and board encoding as Dots_and_Boxes in main.py,
+    so bots can play each other without a window.
+    """
+
+    def __init__(self, rows=3, cols=3, player1_turn=True):
+        """Start a new game.
+
+        Args:
+            rows (int, optional): Number of box rows. Defaults to 3.
+            cols (int, optional): Number of box columns. Defaults to 3.
+            player1_turn (bool, optional): True if player 1 starts.
+                Defaults to True.
+        """
+        self.board_status = np.zeros(shape=(rows, cols))
+        self.row_status = np.zeros(shape=(rows + 1, cols))
+        self.col_status = np.zeros(shape=(rows, cols + 1))
+        self.player1_turn = player1_turn
+
+    def state(self) -> GameState:
+        """Get a copy of the current game state.
+
+        Returns:
+            GameState: The game state.
+        """
+        return GameState(
+            self.board_status.copy(),
+            self.row_status.copy(),
+            self.col_status.copy(),
+            self.player1_turn,
+        )
+
+    def is_valid(self, action: GameAction) -> bool:
+        """Check if an action marks a free line.
+
+        Args:
+            action (GameAction): Action to check.
+
+        Returns:
+            bool: True if the action can be played.
+        """
+        (x, y) = action.position
+        status = (
+            self.row_status
+            if action.action_type == 'row'
+            else self.col_status
+        )
+        (ny, nx) = status.shape
+        return 0 <= x < nx and 0 <= y < ny and status[y, x] == 0
+
+    def play(self, action: GameAction) -> bool:
+        """Mark a line and switch turn unless a box is completed.
+
+        Args:
+            action (GameAction): Action to play.
+
+        Returns:
+            bool: True if a box has been completed.
+        """
+        (x, y) = action.position
+        (rows, cols) = self.board_status.shape
+        modifier = -1 if self.player1_turn else 1
+        tiles = []
+        if y < rows and x < cols:
+            tiles.append((y, x))
+        if action.action_type == 'row':
+            self.row_status[y, x] = 1
+            if y >= 1:
+                tiles.append((y - 1, x))
+        else:
+            self.col_status[y, x] = 1
+            if x >= 1:
+                tiles.append((y, x - 1))
+
+        scored = False
+        for tile in tiles:
+            self.board_status[tile] = (
+                abs(self.board_status[tile]) + 1
+            ) * modifier
+            if abs(self.board_status[tile]) == 4:
+                scored = True
+
+        if not scored:
+            self.player1_turn = not self.player1_turn
+        return scored
+
+    def is_over(self) -> bool:
+        """Check if every line has been marked.
+
+        Returns:
+            bool: True if the game is over.
+        """
+        return bool(
+            (self.row_status == 1).all() and (self.col_status == 1).all(),
+        )
+
+    def scores(self) -> Tuple[int, int]:
+        """Count boxes of both players.
+
+        Returns:
+            Tuple[int, int]: Boxes of player 1 and player 2.
+        """
+        return (
+            int((self.board_status == -4).sum()),
+            int((self.board_status == 4).sum()),
+        )
@@ -0,0 +1,236 @@
+"""Precomputed edge and tile tables for a board size."""
+from functools import lru_cache
+from random import Random
+from typing import Dict, List, Tuple
+
+from datatypes import Move, Moves, Tiles
+from GameState import GameState
+
+
+class Layout(object):
+    """
+    A class to hold the lookup tables of a board size.
+
+    Edges are indexed row-major, horizontal lines first, then vertical lines,
+    which is the same order PseudoBoard.available_moves yields them.
+    Tiles are indexed row-major as well (x * cols + y).
+
+    Example of edge indexes for a 3x3 board
+        +-0-+-1-+-2-+
+        12  13  14  15
+        +-3-+-4-+-5-+
+        16  17  18  19
+        +-6-+-7-+-8-+
+        20  21  22  23
+        +-9-+10-+11-+
+    """
+
+    def __init__(self, rows: int, cols: int):
+        """Build lookup tables for a board of rows x cols tiles.
+
+        Args:
+            rows (int): Number of tile rows.
+            cols (int): Number of tile columns.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.tiles: Tiles = [
+            (x, y) for x in range(rows) for y in range(cols)
+        ]
+
+        # Edge index <-> move
+        self.moves: Moves = []
+        for x in range(rows + 1):
+            for y in range(cols):
+                self.moves.append(Move('row', (x, y)))
+        for x in range(rows):
+            for y in range(cols + 1):
+                self.moves.append(Move('col', (x, y)))
+        self.edge_count = len(self.moves)
+        self.edge_index: Dict[Move, int] = {
+            move: idx for idx, move in enumerate(self.moves)
+        }
+        self.full = (1 << self.edge_count) - 1
+
+        # Tile -> its four edges (top, bottom, left, right)
+        self.tile_edges: List[Tuple[int, int, int, int]] = [
+            (
+                self.index('row', (x, y)),
+                self.index('row', (x + 1, y)),
+                self.index('col', (x, y)),
+                self.index('col', (x, y + 1)),
+            )
+            for (x, y) in self.tiles
+        ]
+        self.tile_masks: List[int] = [
+            sum(1 << edge for edge in edges) for edges in self.tile_edges
+        ]
+
+        # Edge -> tiles on both of its sides
+        self.edge_tiles: List[Tuple[int, ...]] = [
+            tuple(
+                self.tile_index(tile)
+                for tile in edge_sides(move)
+                if self.valid_tile(tile)
+            )
+            for move in self.moves
+        ]
+
+        # Tile -> (neighbor tile, shared edge)
+        self.neighbors: List[List[Tuple[int, int]]] = [
+            [] for _ in range(self.size)
+        ]
+        for edge, tiles in enumerate(self.edge_tiles):
+            if len(tiles) == 2:
+                (a, b) = tiles
+                self.neighbors[a].append((b, edge))
+                self.neighbors[b].append((a, edge))
+
+        # Zobrist keys, seeded by size so hashes are stable between runs
+        rng = Random(rows * 1000 + cols)
+        self.edge_keys: List[int] = [
+            rng.getrandbits(64) for _ in range(self.edge_count)
+        ]
+        self.box_keys: List[List[int]] = [
+            [rng.getrandbits(64) for _ in range(self.size)]
+            for _ in range(2)
+        ]
+        self.turn_key = rng.getrandbits(64)
+
+    def index(self, orientation: str, position: Tuple[int, int]) -> int:
+        """Get edge index of a move.
+
+        Args:
+            orientation (str): Orientation of the move.
+            position (Tuple[int, int]): Position of the move.
+
+        Returns:
+            int: Edge index.
+        """
+        (x, y) = position
+        if orientation == 'row':
+            return x * self.cols + y
+        return (self.rows + 1) * self.cols + x * (self.cols + 1) + y
+
+    def tile_index(self, tile: Tuple[int, int]) -> int:
+        """Get index of a tile.
+
+        Args:
+            tile (Tuple[int, int]): Tile to get index.
+
+        Returns:
+            int: Tile index.
+        """
+        return tile[0] * self.cols + tile[1]
+
+    def valid_tile(self, tile: Tuple[int, int]) -> bool:
+        """Check if a tile is inside the board.
+
+        Args:
+            tile (Tuple[int, int]): Tile to check.
+
+        Returns:
+            bool: True if tile is valid, False otherwise.
+        """
+        (x, y) = tile
+        return 0 <= x < self.rows and 0 <= y < self.cols
+
+    def edges_of(self, state: GameState) -> int:
+        """Encode the marked lines of a game state into a bitmask.
+
+        Args:
+            state (GameState): Game state to encode.
+
+        Returns:
+            int: Bitmask of marked edges.
+        """
+        edges = 0
+        for idx, (orientation, position) in enumerate(self.moves):
+            if state.status(orientation)[position]:
+                edges |= 1 << idx
+        return edges
+
+    def boxes_of(self, state: GameState, score: int) -> int:
+        """Encode the squares owned by a player into a bitmask.
+
+        Args:
+            state (GameState): Game state to encode.
+            score (int): Board status value of the player (-4 or 4).
+
+        Returns:
+            int: Bitmask of owned tiles.
+        """
+        boxes = 0
+        for idx, tile in enumerate(self.tiles):
+            if state.board_status[tile] == score:
+                boxes |= 1 << idx
+        return boxes
+
+    def hash_of(
+        self,
+        edges: int,
+        boxes: List[int],
+        player1_turn: bool,
+    ) -> int:
+        """Compute the Zobrist hash of a position.
+
+        Args:
+            edges (int): Bitmask of marked edges.
+            boxes (List[int]): Bitmask of owned tiles for each player.
+            player1_turn (bool): True if it is player 1 turn.
+
+        Returns:
+            int: Zobrist hash of the position.
+        """
+        key = self.turn_key if player1_turn else 0
+        for idx in range(self.edge_count):
+            if edges >> idx & 1:
+                key ^= self.edge_keys[idx]
+        for (owner, keys) in zip(boxes, self.box_keys):
+            for idx in range(self.size):
+                if owner >> idx & 1:
+                    key ^= keys[idx]
+        return key
+
+
+def edge_sides(move: Move) -> Tiles:
+    """Get tiles on both sides of an edge, valid or not.
+
+    Args:
+        move (Move): Edge to get sides of.
+
+    Returns:
+        Tiles: The two tiles sharing the edge.
+    """
+    (orientation, (x, y)) = move
+    if orientation == 'row':
+        return [(x, y), (x - 1, y)]
+    return [(x, y), (x, y - 1)]
+
+
+@lru_cache(maxsize=None)
+def get_layout(rows: int, cols: int) -> Layout:
+    """Get the (cached) layout of a board size.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+
+    Returns:
+        Layout: Layout of the board.
+    """
+    return Layout(rows, cols)
+
+
+def layout_of(state: GameState) -> Layout:
+    """Get the layout matching the shape of a game state.
+
+    Args:
+        state (GameState): Game state to get layout of.
+
+    Returns:
+        Layout: Layout of the board.
+    """
+    (rows, cols) = state.board_status.shape
+    return get_layout(rows, cols)
@@ -1,21 +1,36 @@
 """Local search agent definition."""
-from random import randint
+from random import choice, randint
 from time import time
+from typing import Dict, List, Optional
 
-from agent import Agent
+import numpy as np
+
+from agent import Agent, make_board
+from batch_eval import get_evaluator
 from Bot import Bot
-from datatypes import Eval, Move
+from datatypes import Engine, Eval, Move
+from equivalence import distinct_moves
+from eval_cache import EVAL_CACHE_SIZE, EvalCache
 from GameAction import GameAction
 from GameState import GameState
+from layout import Layout
 from logger import LOGGER
 from player import Player
-from pseudoboard import PseudoBoard
 
 
 class LocalSearchAgent(Agent):
     """Local search agent class definition."""
 
-    def __init__(self, state: GameState, turn: Player, use_eval=True):
+    def __init__(
+        self,
+        state: GameState,
+        turn: Player,
+        use_eval=True,
+        engine: Engine = 'numpy',
+        batch=True,
+        equivalence=True,
+        eval_cache: Optional[EvalCache] = None,
+    ):
         """Initialize the agent.
 
         Args:
@@ -23,10 +38,22 @@ class LocalSearchAgent(Agent):
             turn (Player): Get the turn of player.
             use_eval (bool, optional): Use heuristics to eval.
                 Defaults to True.
+            engine (Engine, optional): Board engine to use.
+                Defaults to 'numpy'.
+            batch (bool, optional): Evaluate all moves at once with array
+                operations. Defaults to True.
+            equivalence (bool, optional): Evaluate one move of every class
+                of moves of the same value, when not in batch.
+                Defaults to True.
+            eval_cache (Optional[EvalCache], optional): Cache of board
+                evaluations, when not in batch. Defaults to None.
         """
-        self.board = PseudoBoard(state)
+        self.board = make_board(state, engine)
         self.turn = turn
         self.use_eval = use_eval
+        self.batch = batch
+        self.equivalence = equivalence
+        self.eval_cache = eval_cache
 
     def _search(self) -> Eval:
         """Search for the best move.
@@ -34,11 +61,16 @@ class LocalSearchAgent(Agent):
         Returns:
             Eval: The best move and its score.
         """
+        if self.batch:
+            return self.search_batch()
+
         best_eval = -99
         move: Move = None
 
         # Store possible moves info
         possible_move = self.board.available_moves()
+        if self.equivalence:
+            possible_move = distinct_moves(self.board.tracker, possible_move)
 
         # Iterate over possible moves
         for _ in possible_move:
@@ -57,13 +89,20 @@ class LocalSearchAgent(Agent):
             # Move to the state of selected move
             self.board.play(orientation, position)
 
-            evl = self.board.objective(self.turn, self.use_eval)
+            if self.eval_cache is None:
+                evl = self.board.objective(self.turn, self.use_eval)
+            else:
+                evl = self.eval_cache.objective(
+                    self.board, self.turn, self.use_eval,
+                )
             if evl > best_eval:
                 best_eval = evl
                 move = Move(orientation, position)
 
             self.board.revert()
 
+        if self.eval_cache is not None:
+            LOGGER.debug(self.eval_cache.stats())
         if LOGGER.is_debug() and LOGGER.is_verbose():
             self.board.play(move[0], move[1])
             LOGGER.debug(
@@ -82,20 +121,61 @@ class LocalSearchAgent(Agent):
 
         return Eval(move, best_eval)
 
+    def search_batch(self) -> Eval:
+        """Evaluate all moves at once, best move chosen at random on ties.
+
+        Returns:
+            Eval: The best move and its score.
+        """
+        evaluator = get_evaluator(self.board.layout)
+        (moves, scores, _) = evaluator.evaluate(
+            self.board,
+            self.turn,
+            self.use_eval,
+        )
+        best = choice(np.flatnonzero(scores == scores.max()))
+        return Eval(moves[best], int(scores[best]))
+
 
 class LocalSearchBot(Bot):
     """Local Search Bot class definition."""
 
     use_eval: bool
-
-    def __init__(self, use_eval=True):
+    engine: Engine
+    batch: bool
+    equivalence: bool
+    eval_cache: Optional[EvalCache]
+
+    def __init__(
+        self,
+        use_eval=True,
+        engine: Engine = 'numpy',
+        batch=True,
+        equivalence=True,
+        eval_cache_size=EVAL_CACHE_SIZE,
+    ):
         """Initialize local search bot.
 
         Args:
             use_eval (bool, optional): Use heuristics to
                 evaluate board. Defaults to True.
+            engine (Engine, optional): Board engine to use.
+                Defaults to 'numpy'.
+            batch (bool, optional): Evaluate all moves at once.
+                Defaults to True.
+            equivalence (bool, optional): Evaluate one move of every class
+                of moves of the same value. Defaults to True.
+            eval_cache_size (int, optional): Board evaluations kept between
+                turns when not in batch, 0 to disable it.
+                Defaults to EVAL_CACHE_SIZE.
         """
         self.use_eval = use_eval
+        self.engine = engine
+        self.batch = batch
+        self.equivalence = equivalence
+        self.eval_cache = (
+            EvalCache(eval_cache_size) if eval_cache_size else None
+        )
 
     def get_action(self, state: GameState) -> GameAction:
         """Get action of game state.
@@ -113,7 +193,15 @@ class LocalSearchBot(Bot):
         else:
             turn = Player.even
 
-        agent = LocalSearchAgent(state, turn, self.use_eval)
+        agent = LocalSearchAgent(
+            state,
+            turn,
+            self.use_eval,
+            self.engine,
+            self.batch,
+            self.equivalence,
+            self.eval_cache,
+        )
         move, val_node = agent.search()
 
         dur = round(time() - start, 2)
@@ -121,3 +209,40 @@ class LocalSearchBot(Bot):
         LOGGER.perf(f'Thinking time: {dur}s')
 
         return GameAction(move.orientation, move.position)
+
+    def get_actions(self, states: List[GameState]) -> List[GameAction]:
+        """Get actions of many games, evaluated together.
+
+        Games of the same board size are stacked and their children are
+        evaluated with a single pass of array operations.
+
+        Args:
+            states (List[GameState]): States of the games.
+
+        Returns:
+            List[GameAction]: Game action of every game, in order.
+        """
+        if not self.batch:
+            return super().get_actions(states)
+        start = time()
+
+        boards = [make_board(state, self.engine) for state in states]
+        groups: Dict[Layout, List[int]] = {}
+        for idx, board in enumerate(boards):
+            groups.setdefault(board.layout, []).append(idx)
+
+        actions: List[GameAction] = [None] * len(states)
+        for layout, indexes in groups.items():
+            children = get_evaluator(layout).evaluate_many(
+                [boards[idx] for idx in indexes],
+                [boards[idx].player for idx in indexes],
+                self.use_eval,
+            )
+            for idx, (moves, scores, _) in zip(indexes, children):
+                best = choice(np.flatnonzero(scores == scores.max()))
+                (orientation, position) = moves[best]
+                actions[idx] = GameAction(orientation, position[::-1])
+
+        dur = round(time() - start, 2)
+        LOGGER.perf(f'Thinking time: {dur}s for {len(states)} games')
+        return actions
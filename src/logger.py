@@ -1,6 +1,9 @@
 class Logger(object):
 
     def __init__(self, debug=True, verbose=False, perf=False):
+        self.configure(debug, verbose, perf)
+
+    def configure(self, debug=True, verbose=False, perf=False):
         self._debug = debug
         self._verbose = verbose
         self._perf = perf
@@ -23,5 +26,8 @@ class Logger(object):
     def is_verbose(self):
         return self._verbose
 
+    def is_perf(self):
+        return self._perf
+
 
 LOGGER = Logger(perf=True)
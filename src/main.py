@@ -3,6 +3,8 @@
 # Email: aqeel.anwar@gatech.edu
 # Modified by GaIB 19 Assistants
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import time
 from tkinter import *
 from typing import Optional
 
@@ -23,19 +25,24 @@ player1_color_light = '#67B0CF'
 player2_color = '#EE4035'
 player2_color_light = '#EE7E77'
 Green_color = '#7BC043'
-dot_width = 0.25*size_of_board/number_of_dots
-edge_width = 0.1*size_of_board/number_of_dots
-distance_between_dots = size_of_board / (number_of_dots)
 
 BOT_TURN_INTERVAL_MS = 100
+THINKING_POLL_MS = 100
 LEFT_CLICK = '<Button-1>'
+RESTART_KEY = '<Key-r>'
 
 
 class Dots_and_Boxes():
     # ------------------------------------------------------------------
     # Initialization functions
     # ------------------------------------------------------------------
-    def __init__(self, bot1: Optional[Bot] = None, bot2: Optional[Bot] = None):
+    def __init__(self, bot1: Optional[Bot] = None, bot2: Optional[Bot] = None,
+                 number_of_dots: int = number_of_dots, ponder: bool = True):
+        self.number_of_dots = number_of_dots
+        self.dot_width = 0.25*size_of_board/number_of_dots
+        self.edge_width = 0.1*size_of_board/number_of_dots
+        self.distance_between_dots = size_of_board / (number_of_dots)
+
         self.window = Tk()
         self.window.title('Dots_and_Boxes')
         self.canvas = Canvas(
@@ -46,14 +53,26 @@ class Dots_and_Boxes():
 
         self.bot1 = bot1
         self.bot2 = bot2
+        # Let bots think during the turns of a human player
+        self.ponder = ponder
+        # Bots think in one background thread, results of an earlier game
+        # are dropped
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future: Optional[Future] = None
+        self.restarting = False
+        self.game_id = 0
+        self.thinking_handle = []
+        self.window.bind(RESTART_KEY, self.restart)
+        self.window.protocol('WM_DELETE_WINDOW', self.close)
         self.play_again()
 
     def play_again(self):
+        self.game_id += 1
         self.refresh_board()
         self.board_status = np.zeros(
-            shape=(number_of_dots - 1, number_of_dots - 1))
-        self.row_status = np.zeros(shape=(number_of_dots, number_of_dots - 1))
-        self.col_status = np.zeros(shape=(number_of_dots - 1, number_of_dots))
+            shape=(self.number_of_dots - 1, self.number_of_dots - 1))
+        self.row_status = np.zeros(shape=(self.number_of_dots, self.number_of_dots - 1))
+        self.col_status = np.zeros(shape=(self.number_of_dots - 1, self.number_of_dots))
         self.pointsScored = False
 
         # Input from user in form of clicks
@@ -70,6 +89,42 @@ class Dots_and_Boxes():
     def mainloop(self):
         self.window.mainloop()
 
+    def stop_bots(self):
+        for bot in (self.bot1, self.bot2):
+            if bot is not None:
+                bot.stop()
+
+    def restart(self, event=None):
+        # Cancels the running search and starts a new game once it has
+        # returned, so that it does not change the bots during the new game
+        if self.restarting:
+            return
+        self.restarting = True
+        # Drops the pending turn and polls of the game
+        self.game_id += 1
+        self.window.unbind(LEFT_CLICK)
+        if self.future is not None and self.future.cancel():
+            self.future = None
+        self.stop_bots()
+        self.play_when_stopped()
+
+    def play_when_stopped(self):
+        # Polls the cancelled search from the Tk loop, stopping it again in
+        # case it had not started its search yet
+        if self.future is not None and not self.future.done():
+            self.stop_bots()
+            self.window.after(THINKING_POLL_MS, self.play_when_stopped)
+            return
+        self.future = None
+        self.restarting = False
+        self.canvas.delete("all")
+        self.play_again()
+
+    def close(self):
+        self.stop_bots()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.window.destroy()
+
     # ------------------------------------------------------------------
     # Logical Functions:
     # The modules required to carry out game logic
@@ -88,8 +143,8 @@ class Dots_and_Boxes():
 
     def convert_grid_to_logical_position(self, grid_position):
         grid_position = np.array(grid_position)
-        position = (grid_position-distance_between_dots /
-                    4)//(distance_between_dots/2)
+        position = (grid_position-self.distance_between_dots /
+                    4)//(self.distance_between_dots/2)
 
         type = False
         logical_position = []
@@ -133,7 +188,7 @@ class Dots_and_Boxes():
         if self.player1_turn:
             playerModifier = -1
 
-        if y < (number_of_dots-1) and x < (number_of_dots-1):
+        if y < (self.number_of_dots-1) and x < (self.number_of_dots-1):
             self.board_status[y][x] = (
                 abs(self.board_status[y][x]) + val) * playerModifier
             if abs(self.board_status[y][x]) == 4:
@@ -165,18 +220,18 @@ class Dots_and_Boxes():
 
     def make_edge(self, type, logical_position):
         if type == 'row':
-            start_x = distance_between_dots/2 + \
-                logical_position[0]*distance_between_dots
-            end_x = start_x+distance_between_dots
-            start_y = distance_between_dots/2 + \
-                logical_position[1]*distance_between_dots
+            start_x = self.distance_between_dots/2 + \
+                logical_position[0]*self.distance_between_dots
+            end_x = start_x+self.distance_between_dots
+            start_y = self.distance_between_dots/2 + \
+                logical_position[1]*self.distance_between_dots
             end_y = start_y
         elif type == 'col':
-            start_y = distance_between_dots / 2 + \
-                logical_position[1] * distance_between_dots
-            end_y = start_y + distance_between_dots
-            start_x = distance_between_dots / 2 + \
-                logical_position[0] * distance_between_dots
+            start_y = self.distance_between_dots / 2 + \
+                logical_position[1] * self.distance_between_dots
+            end_y = start_y + self.distance_between_dots
+            start_x = self.distance_between_dots / 2 + \
+                logical_position[0] * self.distance_between_dots
             end_x = start_x
 
         if self.player1_turn:
@@ -184,7 +239,7 @@ class Dots_and_Boxes():
         else:
             color = player2_color
         self.canvas.create_line(start_x, start_y, end_x,
-                                end_y, fill=color, width=edge_width)
+                                end_y, fill=color, width=self.edge_width)
 
     def display_gameover(self):
         player1_score = len(np.argwhere(self.board_status == -4))
@@ -221,21 +276,21 @@ class Dots_and_Boxes():
                                 text=score_text)
 
     def refresh_board(self):
-        for i in range(number_of_dots):
-            x = i*distance_between_dots+distance_between_dots/2
-            self.canvas.create_line(x, distance_between_dots/2, x,
-                                    size_of_board-distance_between_dots/2,
+        for i in range(self.number_of_dots):
+            x = i*self.distance_between_dots+self.distance_between_dots/2
+            self.canvas.create_line(x, self.distance_between_dots/2, x,
+                                    size_of_board-self.distance_between_dots/2,
                                     fill='gray', dash=(2, 2))
-            self.canvas.create_line(distance_between_dots/2, x,
-                                    size_of_board-distance_between_dots/2, x,
+            self.canvas.create_line(self.distance_between_dots/2, x,
+                                    size_of_board-self.distance_between_dots/2, x,
                                     fill='gray', dash=(2, 2))
 
-        for i in range(number_of_dots):
-            for j in range(number_of_dots):
-                start_x = i*distance_between_dots+distance_between_dots/2
-                end_x = j*distance_between_dots+distance_between_dots/2
-                self.canvas.create_oval(start_x-dot_width/2, end_x-dot_width/2, start_x+dot_width/2,
-                                        end_x+dot_width/2, fill=dot_color,
+        for i in range(self.number_of_dots):
+            for j in range(self.number_of_dots):
+                start_x = i*self.distance_between_dots+self.distance_between_dots/2
+                end_x = j*self.distance_between_dots+self.distance_between_dots/2
+                self.canvas.create_oval(start_x-self.dot_width/2, end_x-self.dot_width/2, start_x+self.dot_width/2,
+                                        end_x+self.dot_width/2, fill=dot_color,
                                         outline=dot_color)
 
     def display_turn_text(self):
@@ -249,16 +304,26 @@ class Dots_and_Boxes():
 
         self.canvas.delete(self.turntext_handle)
         self.turntext_handle = self.canvas.create_text(size_of_board - 5*len(text),
-                                                       size_of_board-distance_between_dots/8,
+                                                       size_of_board-self.distance_between_dots/8,
                                                        font="cmr 15 bold", text=text, fill=color)
 
+    def display_thinking_text(self, elapsed: float, nodes: int):
+        text = f'Thinking... {elapsed:.1f}s'
+        if nodes:
+            text += f', {nodes} nodes'
+
+        self.canvas.delete(self.thinking_handle)
+        self.thinking_handle = self.canvas.create_text(5*len(text),
+                                                       size_of_board-self.distance_between_dots/8,
+                                                       font="cmr 15 bold", text=text, fill='gray')
+
     def shade_box(self, box, color):
-        start_x = distance_between_dots / 2 + \
-            box[1] * distance_between_dots + edge_width/2
-        start_y = distance_between_dots / 2 + \
-            box[0] * distance_between_dots + edge_width/2
-        end_x = start_x + distance_between_dots - edge_width
-        end_y = start_y + distance_between_dots - edge_width
+        start_x = self.distance_between_dots / 2 + \
+            box[1] * self.distance_between_dots + self.edge_width/2
+        start_y = self.distance_between_dots / 2 + \
+            box[0] * self.distance_between_dots + self.edge_width/2
+        end_x = start_x + self.distance_between_dots - self.edge_width
+        end_y = start_y + self.distance_between_dots - self.edge_width
         self.canvas.create_rectangle(
             start_x, start_y, end_x, end_y, fill=color, outline='')
 
@@ -273,7 +338,7 @@ class Dots_and_Boxes():
 
         self.canvas.delete(self.turntext_handle)
         self.turntext_handle = self.canvas.create_text(size_of_board - 5*len(text),
-                                                       size_of_board-distance_between_dots/8,
+                                                       size_of_board-self.distance_between_dots/8,
                                                        font="cmr 15 bold", text=text, fill=color)
 
     def click(self, event):
@@ -283,9 +348,7 @@ class Dots_and_Boxes():
                 grid_position)
             self.update(valid_input, logical_position)
         else:
-            self.canvas.delete("all")
-            self.play_again()
-            self.reset_board = False
+            self.restart()
 
     def update(self, valid_input, logical_position):
         if valid_input and not self.is_grid_occupied(logical_position, valid_input):
@@ -309,18 +372,39 @@ class Dots_and_Boxes():
     def turn(self):
         current_bot = self.bot1 if self.player1_turn else self.bot2
         if current_bot is None:
+            waiting_bot = self.bot2 if self.player1_turn else self.bot1
+            if self.ponder and waiting_bot is not None:
+                waiting_bot.ponder(self.game_state())
             self.window.bind(LEFT_CLICK, self.click)
         else:
-            self.window.after(BOT_TURN_INTERVAL_MS, self.bot_turn, current_bot)
+            self.window.after(BOT_TURN_INTERVAL_MS, self.bot_turn, current_bot,
+                              self.game_id)
 
-    def bot_turn(self, bot: Bot):
-        state = GameState(
+    def game_state(self) -> GameState:
+        return GameState(
             self.board_status.copy(),
             self.row_status.copy(),
             self.col_status.copy(),
             self.player1_turn
         )
-        action = bot.get_action(state)
+
+    def bot_turn(self, bot: Bot, game_id: int):
+        if game_id != self.game_id:
+            return
+        self.future = self.executor.submit(bot.get_action, self.game_state())
+        self.poll_bot(bot, self.future, game_id, time())
+
+    def poll_bot(self, bot: Bot, future: Future, game_id: int, start: float):
+        # Checks the bot thread from the Tk loop until the action is ready
+        if game_id != self.game_id:
+            return
+        if not future.done():
+            self.display_thinking_text(time() - start, bot.progress())
+            self.window.after(THINKING_POLL_MS, self.poll_bot, bot, future,
+                              game_id, start)
+            return
+        self.canvas.delete(self.thinking_handle)
+        action = future.result()
         self.update(action.action_type, action.position)
 
 
@@ -330,6 +414,9 @@ if __name__ == "__main__":
     PvP mode: game_instance = Dots_and_Boxes(None, None)
     PvB mode: game_instance = Dots_and_Boxes(None, BotName()) or game_instance = Dots_and_Boxes(BotName(), None)
     BvB mode: game_instance = Dots_and_Boxes(BotName(), BotName())
+    Board size: game_instance = Dots_and_Boxes(..., number_of_dots=6)
+    No thinking on human turns: game_instance = Dots_and_Boxes(..., ponder=False)
+    Press r to cancel the game in progress and play again
     """
     game_instance = Dots_and_Boxes(LocalSearchBot(), MinimaxBot())
     game_instance.mainloop()
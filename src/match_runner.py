@@ -0,0 +1,384 @@
+"""Headless bot-vs-bot match runner.
+
+Every pair of bots plays the given number of games, alternating which
+bot plays first, and a summary table is printed (and written to a file).
+Games can be spread over worker processes, each game seeded from its
+index so runs are reproducible, and the thinking time of agents can be
+scaled down for quick regression runs.
+
+Bots are given as name[:option=value,...], for example:
+    python match_runner.py minimax local random --games 100
+    python match_runner.py minimax:engine='bitboard' minimax --size 4 4
+    python match_runner.py minimax local --games 500 --workers 8 --scale 0.1
+"""
+import argparse
+import random
+from ast import literal_eval
+from itertools import combinations
+from multiprocessing import Pool
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from agent import THINKING_TIME, Agent
+from Bot import Bot
+from game import HeadlessGame
+from local_search_agent import LocalSearchBot
+from logger import LOGGER
+from mcts_agent import MCTSBot
+from minimax_agent import MinimaxBot
+from perfect_agent import PerfectBot
+from RandomBot import RandomBot
+from util import unreachable
+
+BOTS = {
+    'minimax': MinimaxBot,
+    'local': LocalSearchBot,
+    'random': RandomBot,
+    'perfect': PerfectBot,
+    'mcts': MCTSBot,
+}
+
+
+class GameResult(NamedTuple):
+    """Result of a headless game."""
+
+    players: Tuple[str, str]
+    scores: Tuple[int, int]
+    times: Tuple[List[float], List[float]]
+
+
+class Record(object):
+    """Results of a bot against an opponent."""
+
+    def __init__(self):
+        """Initialize an empty record."""
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+        self.margin = 0
+        self.times: List[float] = []
+
+    @property
+    def games(self) -> int:
+        """Get number of games played.
+
+        Returns:
+            int: Number of games.
+        """
+        return self.wins + self.losses + self.draws
+
+    def add(self, score: int, opponent_score: int, times: List[float]):
+        """Add a game to the record.
+
+        Args:
+            score (int): Boxes of the bot.
+            opponent_score (int): Boxes of the opponent.
+            times (List[float]): Thinking time of every move of the bot.
+        """
+        if score > opponent_score:
+            self.wins += 1
+        elif score < opponent_score:
+            self.losses += 1
+        else:
+            self.draws += 1
+        self.margin += score - opponent_score
+        self.times.extend(times)
+
+
+class Summary(object):
+    """Aggregated results of a match, updated game by game."""
+
+    def __init__(self):
+        """Initialize an empty summary."""
+        self.records: Dict[Tuple[str, str], Record] = {}
+
+    def add(self, result: GameResult):
+        """Add a game result.
+
+        Args:
+            result (GameResult): Result to add.
+        """
+        for side in (0, 1):
+            key = (result.players[side], result.players[1 - side])
+            record = self.records.setdefault(key, Record())
+            record.add(
+                result.scores[side],
+                result.scores[1 - side],
+                result.times[side],
+            )
+
+    def table(self) -> str:
+        """Format the summary as a table.
+
+        Returns:
+            str: The table.
+        """
+        width = max([len(name) for key in self.records for name in key] + [8])
+        header = (
+            f'{"bot":<{width}} {"opponent":<{width}} {"games":>6} '
+            f'{"win":>5} {"loss":>5} {"draw":>5} {"win%":>6} {"margin":>7} '
+            f'{"avg s":>7} {"max s":>7}'
+        )
+        lines = [header, '-' * len(header)]
+        for (bot, opponent), record in sorted(self.records.items()):
+            games = record.games
+            times = record.times or [0.0]
+            lines.append(
+                f'{bot:<{width}} {opponent:<{width}} {games:>6} '
+                f'{record.wins:>5} {record.losses:>5} {record.draws:>5} '
+                f'{100 * record.wins / games:>6.1f} '
+                f'{record.margin / games:>7.2f} '
+                f'{sum(times) / len(times):>7.3f} {max(times):>7.3f}',
+            )
+        return '\n'.join(lines)
+
+
+def parse_options(options: str) -> Dict[str, Any]:
+    """Parse keyword arguments given as option=value,...
+
+    Args:
+        options (str): Options, values are Python literals.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments.
+    """
+    kwargs = {}
+    for option in filter(None, options.split(',')):
+        (key, _, value) = option.partition('=')
+        kwargs[key] = literal_eval(value)
+    return kwargs
+
+
+def spec_of(name: str) -> str:
+    """Get the specification of a bot from its name in a match.
+
+    Args:
+        name (str): Specification, followed by #idx if the same bot is
+            entered twice.
+
+    Returns:
+        str: The specification.
+    """
+    (spec, mark, idx) = name.rpartition('#')
+    return spec if mark and idx.isdigit() else name
+
+
+def make_bot(spec: str, rows: int = 3, cols: int = 3) -> Bot:
+    """Create a bot from its specification, ready for a board size.
+
+    Args:
+        spec (str): Bot name, optionally followed by :option=value,...
+            and by the #idx of its name in a match.
+        rows (int, optional): Number of box rows. Defaults to 3.
+        cols (int, optional): Number of box columns. Defaults to 3.
+
+    Returns:
+        Bot: The bot.
+    """
+    (name, _, options) = spec_of(spec).partition(':')
+    bot = BOTS[name](**parse_options(options))
+    bot.prepare(rows, cols)
+    return bot
+
+
+class Task(NamedTuple):
+    """A game to be played by a worker."""
+
+    players: Tuple[str, str]
+    rows: int
+    cols: int
+    seed: Optional[int]
+
+
+def play_game(
+    players: Tuple[str, str],
+    rows: int = 3,
+    cols: int = 3,
+    seed: Optional[int] = None,
+) -> GameResult:
+    """Play a game between two bots, the first one moves first.
+
+    Args:
+        players (Tuple[str, str]): Specifications of player 1 and 2 bots.
+        rows (int, optional): Number of box rows. Defaults to 3.
+        cols (int, optional): Number of box columns. Defaults to 3.
+        seed (Optional[int], optional): Seed of random bots and move
+            shuffling. Defaults to None.
+
+    Returns:
+        GameResult: The result.
+    """
+    if seed is not None:
+        random.seed(seed)
+    bots = (
+        make_bot(players[0], rows, cols),
+        make_bot(players[1], rows, cols),
+    )
+    times: Tuple[List[float], List[float]] = ([], [])
+    game = HeadlessGame(rows, cols)
+    while not game.is_over():
+        side = 0 if game.player1_turn else 1
+        start = perf_counter()
+        action = bots[side].get_action(game.state())
+        times[side].append(perf_counter() - start)
+        if not game.is_valid(action):
+            unreachable(f'{players[side]} played invalid action {action}.')
+        game.play(action)
+    return GameResult(players, game.scores(), times)
+
+
+def pairings(specs: List[str], games: int) -> List[Tuple[str, str]]:
+    """List games of a round robin, alternating the first player.
+
+    Args:
+        specs (List[str]): Specifications of the bots.
+        games (int): Number of games for every pair of bots.
+
+    Returns:
+        List[Tuple[str, str]]: Player 1 and 2 of every game.
+    """
+    # Tell apart the same bot entered twice
+    names = [
+        f'{spec}#{idx}' if specs.count(spec) > 1 else spec
+        for idx, spec in enumerate(specs)
+    ]
+    return [
+        (first, second) if game % 2 == 0 else (second, first)
+        for (first, second) in combinations(names, 2)
+        for game in range(games)
+    ]
+
+
+def run_task(task: Task) -> GameResult:
+    """Play the game of a task.
+
+    Args:
+        task (Task): The task.
+
+    Returns:
+        GameResult: The result.
+    """
+    return play_game(task.players, task.rows, task.cols, task.seed)
+
+
+def init_worker(scale: float):
+    """Set up a process to play games.
+
+    Args:
+        scale (float): Factor applied to the thinking time of agents.
+    """
+    LOGGER.configure(debug=False, perf=False)
+    Agent.thinking_time = THINKING_TIME * scale
+
+
+def run_match(
+    specs: List[str],
+    games: int,
+    rows: int = 3,
+    cols: int = 3,
+    workers: int = 1,
+    seed: Optional[int] = 0,
+    scale: float = 1.0,
+) -> Summary:
+    """Play a round robin between bots.
+
+    Args:
+        specs (List[str]): Specifications of the bots.
+        games (int): Number of games for every pair of bots.
+        rows (int, optional): Number of box rows. Defaults to 3.
+        cols (int, optional): Number of box columns. Defaults to 3.
+        workers (int, optional): Number of processes. Defaults to 1.
+        seed (Optional[int], optional): Seed of the first game, the next
+            games use the following seeds. None to not seed.
+            Defaults to 0.
+        scale (float, optional): Factor applied to the thinking time of
+            agents. Defaults to 1.0.
+
+    Returns:
+        Summary: Results of the match.
+    """
+    # Bots unable to play the board size fail before any game
+    for spec in specs:
+        make_bot(spec, rows, cols)
+    tasks = [
+        Task(players, rows, cols, None if seed is None else seed + idx)
+        for idx, players in enumerate(pairings(specs, games))
+    ]
+    summary = Summary()
+    if workers > 1:
+        with Pool(workers, init_worker, (scale,)) as pool:
+            results = pool.imap_unordered(run_task, tasks)
+            collect(summary, results, len(tasks))
+    else:
+        # Games are played in this process, its settings are restored after
+        thinking_time = Agent.thinking_time
+        logging = (LOGGER.is_debug(), LOGGER.is_verbose(), LOGGER.is_perf())
+        init_worker(scale)
+        try:
+            collect(summary, map(run_task, tasks), len(tasks))
+        finally:
+            Agent.thinking_time = thinking_time
+            LOGGER.configure(*logging)
+    return summary
+
+
+def collect(summary: Summary, results: Iterable[GameResult], total: int):
+    """Add results to a summary as they are played.
+
+    Args:
+        summary (Summary): Summary to add results to.
+        results (Iterable[GameResult]): Results of the games.
+        total (int): Number of games.
+    """
+    for idx, result in enumerate(results):
+        summary.add(result)
+        (first, second) = result.players
+        LOGGER.log(
+            f'[{idx + 1}/{total}] {first} vs {second}: '
+            f'{result.scores[0]}-{result.scores[1]}',
+        )
+
+
+def main():
+    """Run a match from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('bots', nargs='+', help='bots to play')
+    parser.add_argument(
+        '--games', type=int, default=10, help='games for every pair of bots',
+    )
+    parser.add_argument(
+        '--size', type=int, nargs=2, default=(3, 3), metavar=('ROWS', 'COLS'),
+        help='number of box rows and columns',
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1, help='number of processes',
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0, help='seed of the first game',
+    )
+    parser.add_argument(
+        '--scale', type=float, default=1.0,
+        help='factor applied to the thinking time of agents',
+    )
+    parser.add_argument('--output', help='file to write the summary to')
+    args = parser.parse_args()
+    if len(args.bots) < 2:
+        parser.error('at least two bots are needed')
+
+    summary = run_match(
+        args.bots,
+        args.games,
+        *args.size,
+        workers=args.workers,
+        seed=args.seed,
+        scale=args.scale,
+    )
+    table = summary.table()
+    LOGGER.log(table)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(table + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,385 @@
+"""Monte Carlo tree search agent definition.
+
+Positions are grown into a tree one node per iteration, children picked
+by UCT (average reward plus an exploration bonus), and every new node is
+valued by a random playout to the end of the game. Nodes only hold the
+edges bitmask, the side to move and the box lead, so playouts run on
+plain integers instead of a PseudoBoard.
+
+The tree under the chosen move is kept by the bot, and the next turn
+starts from the node matching the position after the opponent moves.
+"""
+import math
+from random import shuffle
+from threading import Event
+from time import time
+from typing import Dict, Optional
+
+from agent import Agent, make_board
+from Bot import Bot
+from datatypes import Engine, Eval
+from GameAction import GameAction
+from GameState import GameState
+from layout import Layout, layout_of
+from logger import LOGGER
+
+# UCT exploration constant, for rewards between 0 and 1
+EXPLORATION = 1.4
+
+
+class Node(object):
+    """A position of the search tree."""
+
+    __slots__ = (
+        'edges', 'player1_turn', 'lead', 'edge', 'parent', 'children',
+        'untried', 'visits', 'wins',
+    )
+
+    def __init__(
+        self,
+        layout: Layout,
+        edges: int,
+        player1_turn: bool,
+        lead: int,
+        edge: Optional[int] = None,
+        parent: Optional['Node'] = None,
+    ):
+        """Initialize an unvisited node.
+
+        Args:
+            layout (Layout): Layout of the board.
+            edges (int): Bitmask of marked edges.
+            player1_turn (bool): True if it is player 1 turn.
+            lead (int): Boxes of player 1 minus boxes of player 2.
+            edge (Optional[int], optional): Edge played to reach the node.
+                Defaults to None.
+            parent (Optional[Node], optional): Parent node.
+                Defaults to None.
+        """
+        self.edges = edges
+        self.player1_turn = player1_turn
+        self.lead = lead
+        self.edge = edge
+        self.parent = parent
+        self.children: Dict[int, Node] = {}
+        self.untried = [
+            idx for idx in range(layout.edge_count) if not edges >> idx & 1
+        ]
+        shuffle(self.untried)
+        self.visits = 0
+        # Rewards of the player who played the edge
+        self.wins = 0.0
+
+    def play(self, layout: Layout, edge: int) -> 'Node':
+        """Expand the child of an edge.
+
+        Args:
+            layout (Layout): Layout of the board.
+            edge (int): Index of the edge.
+
+        Returns:
+            Node: The child.
+        """
+        edges = self.edges | 1 << edge
+        captured = captures(layout, edges, edge)
+        if captured:
+            player1_turn = self.player1_turn
+            lead = self.lead + (captured if player1_turn else -captured)
+        else:
+            player1_turn = not self.player1_turn
+            lead = self.lead
+        child = Node(layout, edges, player1_turn, lead, edge, self)
+        self.children[edge] = child
+        return child
+
+    def select(self, exploration: float) -> 'Node':
+        """Get the child of highest UCT value.
+
+        Args:
+            exploration (float): Exploration constant.
+
+        Returns:
+            Node: The child.
+        """
+        log_visits = math.log(self.visits)
+        return max(
+            self.children.values(),
+            key=lambda child: (
+                child.wins / child.visits +
+                exploration * math.sqrt(log_visits / child.visits)
+            ),
+        )
+
+    def find(
+        self,
+        edges: int,
+        player1_turn: bool,
+        lead: int,
+    ) -> Optional['Node']:
+        """Find a visited descendant position.
+
+        Args:
+            edges (int): Bitmask of marked edges.
+            player1_turn (bool): True if it is player 1 turn.
+            lead (int): Boxes of player 1 minus boxes of player 2.
+
+        Returns:
+            Optional[Node]: The node, None if not in the tree.
+        """
+        if self.edges == edges:
+            if self.player1_turn == player1_turn and self.lead == lead:
+                return self
+            return None
+        for child in self.children.values():
+            # Only follow edges marked in the position
+            if child.edges & ~edges == 0:
+                found = child.find(edges, player1_turn, lead)
+                if found is not None:
+                    return found
+        return None
+
+
+def captures(layout: Layout, edges: int, edge: int) -> int:
+    """Count boxes completed by an edge.
+
+    Args:
+        layout (Layout): Layout of the board.
+        edges (int): Bitmask of marked edges, the edge included.
+        edge (int): Index of the edge.
+
+    Returns:
+        int: Number of completed boxes.
+    """
+    captured = 0
+    for tile in layout.edge_tiles[edge]:
+        mask = layout.tile_masks[tile]
+        if edges & mask == mask:
+            captured += 1
+    return captured
+
+
+def playout(layout: Layout, edges: int, player1_turn: bool, lead: int) -> int:
+    """Play random moves to the end of the game.
+
+    Boxes are taken as soon as they are offered, other lines are drawn
+    in random order.
+
+    Args:
+        layout (Layout): Layout of the board.
+        edges (int): Bitmask of marked edges.
+        player1_turn (bool): True if it is player 1 turn.
+        lead (int): Boxes of player 1 minus boxes of player 2.
+
+    Returns:
+        int: Final boxes of player 1 minus boxes of player 2.
+    """
+    free = [idx for idx in range(layout.edge_count) if not edges >> idx & 1]
+    shuffle(free)
+    sides = [(edges & mask).bit_count() for mask in layout.tile_masks]
+    offered = [tile for tile, count in enumerate(sides) if count == 3]
+    remaining = len(free)
+    while remaining:
+        edge = None
+        while offered:
+            tile = offered.pop()
+            if sides[tile] == 3:
+                edge = next(
+                    idx
+                    for idx in layout.tile_edges[tile]
+                    if not edges >> idx & 1
+                )
+                break
+        while edge is None:
+            idx = free.pop()
+            if not edges >> idx & 1:
+                edge = idx
+
+        edges |= 1 << edge
+        remaining -= 1
+        captured = 0
+        for tile in layout.edge_tiles[edge]:
+            sides[tile] += 1
+            if sides[tile] == 4:
+                captured += 1
+            elif sides[tile] == 3:
+                offered.append(tile)
+        if captured:
+            lead += captured if player1_turn else -captured
+        else:
+            player1_turn = not player1_turn
+    return lead
+
+
+def lead_of(state: GameState) -> int:
+    """Count the box lead of player 1 in a game state.
+
+    Args:
+        state (GameState): The game state.
+
+    Returns:
+        int: Boxes of player 1 minus boxes of player 2.
+    """
+    status = state.board_status
+    return int((status == -4).sum() - (status == 4).sum())
+
+
+class MCTSAgent(Agent):
+    """Monte Carlo tree search agent class definition."""
+
+    def __init__(
+        self,
+        state: GameState,
+        root: Optional[Node] = None,
+        exploration=EXPLORATION,
+        engine: Engine = 'numpy',
+    ):
+        """Initialize the agent.
+
+        Args:
+            state (GameState): The initial state of the game.
+            root (Optional[Node], optional): Tree of the state, kept from
+                an earlier search. Defaults to None.
+            exploration (float, optional): UCT exploration constant.
+                Defaults to EXPLORATION.
+            engine (Engine, optional): Board engine of the fallback move.
+                Defaults to 'numpy'.
+        """
+        self.board = make_board(state, engine)
+        self.layout = layout_of(state)
+        if root is None:
+            root = Node(
+                self.layout,
+                self.layout.edges_of(state),
+                state.player1_turn,
+                lead_of(state),
+            )
+        root.parent = None
+        self.root = root
+        self.exploration = exploration
+        self.playouts = 0
+        self.best: Optional[Node] = None
+
+    def iterate(self):
+        """Select, expand, play out and back up one node."""
+        layout = self.layout
+        node = self.root
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+        if node.untried:
+            node = node.play(layout, node.untried.pop())
+        lead = playout(layout, node.edges, node.player1_turn, node.lead)
+        self.playouts += 1
+
+        # Reward of player 1
+        reward = 1.0 if lead > 0 else 0.5 if lead == 0 else 0.0
+        while node.parent is not None:
+            node.visits += 1
+            node.wins += reward if node.parent.player1_turn else 1 - reward
+            node = node.parent
+        node.visits += 1
+
+    def _search(self) -> Eval:
+        """Grow the tree until timeout, then pick the most visited move.
+
+        Returns:
+            Eval: The best move and its win rate.
+        """
+        while not self.deadline.expired():
+            self.iterate()
+            if not self.root.untried and not self.root.children:
+                break
+
+        dur = self.deadline.elapsed()
+        LOGGER.perf(
+            f'Playouts: {self.playouts}, '
+            f'{round(self.playouts / max(dur, 1e-9))} playouts/s',
+        )
+        if not self.root.children:
+            return None
+        best = max(self.root.children.values(), key=lambda child: child.visits)
+        self.best = best
+        return Eval(
+            move=self.layout.moves[best.edge],
+            score=round(best.wins / best.visits, 3),
+        )
+
+
+class MCTSBot(Bot):
+    """Monte Carlo tree search bot class definition."""
+
+    def __init__(
+        self,
+        exploration=EXPLORATION,
+        reuse=True,
+        engine: Engine = 'numpy',
+    ):
+        """Initialize a Monte Carlo tree search bot.
+
+        Args:
+            exploration (float, optional): UCT exploration constant.
+                Defaults to EXPLORATION.
+            reuse (bool, optional): Keep the tree between turns.
+                Defaults to True.
+            engine (Engine, optional): Board engine of the fallback move.
+                Defaults to 'numpy'.
+        """
+        self.exploration = exploration
+        self.reuse = reuse
+        self.engine = engine
+        self.tree: Optional[Node] = None
+        self.searching: Optional[MCTSAgent] = None
+        # Set by stop, until the next get_action
+        self.stop_event = Event()
+
+    def get_action(self, state: GameState) -> GameAction:
+        """Get the next action for Monte Carlo tree search bot.
+
+        Args:
+            state (GameState): The current state of the game.
+
+        Returns:
+            GameAction: The next action.
+        """
+        self.stop_event.clear()
+        start = time()
+        root = None
+        if self.reuse and self.tree is not None:
+            root = self.tree.find(
+                layout_of(state).edges_of(state),
+                state.player1_turn,
+                lead_of(state),
+            )
+            if root is not None:
+                LOGGER.debug(f'Reused tree of {root.visits} playouts')
+
+        agent = MCTSAgent(state, root, self.exploration, self.engine)
+        agent.stop_event = self.stop_event
+        self.searching = agent
+        move, score = agent.search()
+        self.searching = None
+        # Keep the tree under the chosen move
+        self.tree = agent.best if self.reuse else None
+
+        dur = round(time() - start, 2)
+        LOGGER.debug(f'Best move: {move}. Win rate: {score}')
+        LOGGER.perf(f'Thinking time: {dur}s')
+        return GameAction(move.orientation, move.position)
+
+    def progress(self) -> int:
+        """Count playouts of the running search.
+
+        Returns:
+            int: Number of playouts, 0 if not searching.
+        """
+        agent = self.searching
+        return agent.playouts if agent is not None else 0
+
+    def stop(self):
+        """Stop the running search early.
+
+        A search about to start is stopped as soon as it starts.
+        """
+        self.stop_event.set()
+        agent = self.searching
+        if agent is not None:
+            agent.force_stop()
@@ -1,25 +1,82 @@
 """MiniMax Agent definitions."""
 import math
-from time import time
+from threading import Event, RLock, Thread
+from time import monotonic, time
+from typing import Dict, List, Optional, Tuple
 
-from agent import Agent
+import numpy as np
+
+from agent import Agent, make_board
+from batch_eval import get_evaluator
 from Bot import Bot
-from datatypes import Eval, Move
+from captures import capture_moves, safe_capture
+from datatypes import Bound, Engine, Eval, Move, Moves
+from equivalence import distinct_moves
+from eval_cache import EVAL_CACHE_SIZE, EvalCache
+from deadline import Deadline, SearchTimeout
+from endgame import endgame_move, solve_board
 from GameAction import GameAction
 from GameState import GameState
+from layout import Layout, layout_of
 from logger import LOGGER
+from move_ordering import MoveOrderer, NullOrderer
+from opening_book import lookup_book
+from parallel_search import (
+    SplitResult,
+    SplitTask,
+    can_fork,
+    get_pool,
+    new_search_id,
+    raise_alpha,
+    shared_alpha,
+    worker_table,
+)
 from player import Player
 from pseudoboard import PseudoBoard
+from transposition import TABLE_SIZE, TranspositionTable
 from util import unreachable
 
 MAX = math.inf
 MIN = -math.inf
 
+# (available moves threshold, depth), checked in order
+DEPTH_SCHEDULE = (
+    (40, 2),
+    (26, 3),
+    (18, 4),
+    (14, 5),
+    (10, 6),
+)
+
+# Longest search during the opponent's turn, in seconds
+PONDER_TIME = 60.0
+# Half width of the root window around the previous iteration score
+ASPIRATION = 2
+
 
 class MinimaxAgent(Agent):
     """MiniMax agent class definition."""
 
-    def __init__(self, state: GameState, randomize=False, use_eval=True):
+    def __init__(
+        self,
+        state: GameState,
+        randomize=False,
+        use_eval=True,
+        engine: Engine = 'numpy',
+        table_size=TABLE_SIZE,
+        iterative=True,
+        ordering=True,
+        depth: int = None,
+        workers=1,
+        endgame=True,
+        symmetry=True,
+        batch=False,
+        pvs=True,
+        mtdf=False,
+        compress=True,
+        equivalence=True,
+        eval_cache_size=EVAL_CACHE_SIZE,
+    ):
         """Initialize the agent.
 
         Args:
@@ -28,12 +85,73 @@ class MinimaxAgent(Agent):
                 Defaults to False.
             use_eval (bool, optional): Use heuristics to eval.
                 Defaults to True.
+            engine (Engine, optional): Board engine to use.
+                Defaults to 'numpy'.
+            table_size (int, optional): Transposition table slots,
+                0 to disable it. Defaults to TABLE_SIZE.
+            iterative (bool, optional): Deepen the search until timeout
+                instead of using a fixed depth. Defaults to True.
+            ordering (bool, optional): Order moves by class, killer moves
+                and history. Defaults to True.
+            depth (int, optional): Search this fixed depth instead.
+                Defaults to None.
+            workers (int, optional): Split root moves over this many
+                processes. Defaults to 1.
+            endgame (bool, optional): Solve chains and loops endgames
+                exactly. Defaults to True.
+            symmetry (bool, optional): Share table entries between
+                symmetric positions and search symmetric root moves once.
+                Defaults to True.
+            batch (bool, optional): Evaluate the children of nodes above
+                the leaves at once with array operations. Defaults to False.
+            pvs (bool, optional): Use principal variation search, and
+                aspiration windows when deepening. Defaults to True.
+            mtdf (bool, optional): Find the root score with a sequence of
+                null window searches (MTD(f)) instead of aspiration
+                windows, in a single process. Defaults to False.
+            compress (bool, optional): Take boxes offered without a choice
+                at no depth, and only search taking or declining boxes of
+                a chain. Defaults to True.
+            equivalence (bool, optional): Search one move of every class
+                of moves of the same value, in chains and loops cut off
+                from the rest of the board. Defaults to True.
+            eval_cache_size (int, optional): Leaf evaluations kept, 0 to
+                evaluate every leaf again. Defaults to EVAL_CACHE_SIZE.
         """
         super().__init__()
-        self.board = PseudoBoard(state)
+        self.board = make_board(state, engine)
         self.player: Player = Player.of(state.player1_turn)
         self.randomize = randomize
         self.use_eval = use_eval
+        self.engine = engine
+        self.table_size = table_size
+        self.table = TranspositionTable(table_size) if table_size else None
+        self.iterative = iterative
+        self.ordering = ordering
+        self.orderer = MoveOrderer() if ordering else NullOrderer()
+        self.depth = depth
+        self.workers = workers if can_fork() else 1
+        self.endgame = endgame
+        self.symmetry = symmetry
+        self.batch = batch
+        self.pvs = pvs
+        self.mtdf = mtdf
+        self.compress = compress
+        self.equivalence = equivalence
+        self.eval_cache_size = eval_cache_size
+        self.eval_cache = (
+            EvalCache(eval_cache_size) if eval_cache_size else None
+        )
+        if symmetry:
+            self.board.enable_symmetry()
+        self.shared = None
+        # Entries of worker tables are only shared within this search
+        self.search_id = new_search_id()
+        self.pv_move: Move = None
+        self.probes = 0
+        self.researches = 0
+        self.aspiration_fails = 0
+        self.passes = 0
 
     def minimax(
         self,
@@ -56,6 +174,9 @@ class MinimaxAgent(Agent):
             Eval: The best move and its score.
         """
         self.evaluated += 1
+        # The root is not checked, so that it keeps its best move so far
+        if depth:
+            self.deadline.check()
         # Guard
         if self.player != board.player:
             if is_max:
@@ -63,38 +184,112 @@ class MinimaxAgent(Agent):
         elif not is_max:
             unreachable('Agent should not call min for self.')
 
+        # Chains and loops only, solved exactly
+        if self.endgame and depth > 0:
+            score = self.solved(board)
+            if score is not None:
+                return Eval(move=None, score=score)
+
+        # Boxes taken without a choice do not use depth
+        if self.compress:
+            edge = safe_capture(board.tracker)
+            if edge is not None:
+                move = board.layout.moves[edge]
+                board.play(*move)
+                try:
+                    _, score = self.minimax(board, alpha, beta, depth, is_max)
+                finally:
+                    board.revert()
+                return Eval(move=move, score=score)
+
         # Is leaf or depth exceeded
         if board.ended() or depth == self.max_depth:
-            return Eval(
-                move=None,
-                score=board.objective(self.player, self.use_eval),
-            )
+            return Eval(move=None, score=self.evaluate(board))
+
+        # Raise alpha to the best root score found by other workers
+        if self.shared is not None:
+            alpha = max(alpha, self.shared.value)
+
+        # Look up position searched before, possibly through other moves
+        remaining = self.max_depth - depth
+        window = (alpha, beta)
+        table_move: Move = None
+        if self.table is not None:
+            # Moves are stored as in the canonical image of the position
+            (key, sym) = board.canonical_key()
+            entry = self.table.probe(key)
+            if entry is not None:
+                table_move = entry.move
+                if sym:
+                    table_move = board.symmetries.unmap_move(table_move, sym)
+                if entry.depth >= remaining:
+                    if entry.bound == Bound.exact:
+                        return Eval(move=table_move, score=entry.score)
+                    elif entry.bound == Bound.lower:
+                        alpha = max(alpha, entry.score)
+                    else:
+                        beta = min(beta, entry.score)
+                    if beta <= alpha:
+                        return Eval(move=table_move, score=entry.score)
+
+        # Children are all leaves, evaluate them at once
+        if self.batch and remaining == 1:
+            res = self.expand_leaves(board, is_max)
+            if self.table is not None and not self.timeout:
+                stored = res.move
+                if sym:
+                    stored = board.symmetries.map_move(stored, sym)
+                self.table.store(key, 1, res.score, Bound.exact, stored)
+            return res
 
         # Initial values
         action: Move = None
         curr_val = MIN if is_max else MAX
 
-        # Iterate over all possible moves
-        for (orientation, position) in board.available_moves(self.randomize):
-            # Move
-            if self.timeout:
-                break
+        # Try the best move of previous iteration or from table first
+        if depth == 0 and self.pv_move is not None:
+            table_move = self.pv_move
+        moves = self.orderer.order(
+            board,
+            self.candidates(board, remaining),
+            depth,
+        )
+        if table_move is not None and table_move in moves:
+            moves.remove(table_move)
+            moves.insert(0, table_move)
+        if depth == 0 and self.symmetry:
+            moves = board.symmetries.unique_moves(moves, board.tracker.edges)
 
+        # Iterate over all possible moves
+        for (idx, (orientation, position)) in enumerate(moves):
             # Save current player and generate new state based on selected move
             past_player = board.player
             board.play(orientation, position)
 
             # Do minimax over the child with increased depth
             cond_max = past_player == board.player and is_max
-            _, node_val = self.minimax(
-                board,
-                alpha,
-                beta,
-                depth + 1,
-                cond_max or (not is_max and past_player != board.player),
+            child_max = cond_max or (
+                not is_max and past_player != board.player
             )
-            # Revert board
-            board.revert()
+            try:
+                if self.pvs and idx > 0:
+                    node_val = self.probe(
+                        board, alpha, beta, depth + 1, is_max, child_max,
+                    )
+                else:
+                    _, node_val = self.minimax(
+                        board, alpha, beta, depth + 1, child_max,
+                    )
+            except SearchTimeout:
+                # Unwind up to the root, which keeps its best ordered move
+                if depth:
+                    raise
+                if action is None:
+                    action = Move(orientation, position)
+                break
+            finally:
+                # Revert board
+                board.revert()
 
             # Update action based on generated val and current v
             if is_max:
@@ -110,9 +305,135 @@ class MinimaxAgent(Agent):
 
             # Alpha beta pruning
             if beta <= alpha:
+                self.orderer.cutoff(
+                    Move(orientation, position),
+                    depth,
+                    remaining,
+                )
                 break
+
+        # Store result unless search was cut by timeout
+        if self.table is not None and action is not None and not self.timeout:
+            if curr_val <= window[0]:
+                bound = Bound.upper
+            elif curr_val >= window[1]:
+                bound = Bound.lower
+            else:
+                bound = Bound.exact
+            stored = board.symmetries.map_move(action, sym) if sym else action
+            self.table.store(key, remaining, curr_val, bound, stored)
         return Eval(move=action, score=curr_val)
 
+    def evaluate(self, board: PseudoBoard) -> int:
+        """Get the objective value of a board, through the cache if any.
+
+        Args:
+            board (PseudoBoard): The board.
+
+        Returns:
+            int: Objective value of the board for the agent.
+        """
+        if self.eval_cache is None:
+            return board.objective(self.player, self.use_eval)
+        return self.eval_cache.objective(board, self.player, self.use_eval)
+
+    def candidates(self, board: PseudoBoard, remaining: int) -> Moves:
+        """Get the moves worth searching.
+
+        Args:
+            board (PseudoBoard): The board.
+            remaining (int): Depth left to search under the board.
+
+        Returns:
+            Moves: Taking or declining boxes when some can be taken,
+                available moves otherwise, one of every class of moves of
+                the same value.
+        """
+        if self.compress:
+            edges = capture_moves(board.tracker)
+            if edges is not None:
+                return [board.layout.moves[edge] for edge in edges]
+        moves = board.available_moves(self.randomize)
+        # Above the leaves, a move left out saves less than finding classes
+        if self.equivalence and remaining > 1:
+            return distinct_moves(board.tracker, moves)
+        return moves
+
+    def probe(
+        self,
+        board: PseudoBoard,
+        alpha: float,
+        beta: float,
+        depth: int,
+        is_max: bool,
+        child_max: bool,
+    ) -> float:
+        """Search a later child with a null window, again if it is better.
+
+        The first child is expected to be the best, so the others are only
+        tested against its score, and searched with the full window when
+        they turn out better.
+
+        Args:
+            board (PseudoBoard): The board, after the move of the child.
+            alpha (float): The alpha value of the parent.
+            beta (float): The beta value of the parent.
+            depth (int): Depth of the child.
+            is_max (bool): Is the parent maximize player.
+            child_max (bool): Is the child maximize player.
+
+        Returns:
+            float: Score of the child, exact if between alpha and beta.
+        """
+        window = (alpha, alpha + 1) if is_max else (beta - 1, beta)
+        _, score = self.minimax(board, *window, depth, child_max)
+        self.probes += 1
+        if alpha < score < beta:
+            self.researches += 1
+            _, score = self.minimax(board, alpha, beta, depth, child_max)
+        return score
+
+    def solved(self, board: PseudoBoard) -> Optional[int]:
+        """Get the exact score of a board made of chains and loops.
+
+        Args:
+            board (PseudoBoard): The board.
+
+        Returns:
+            Optional[int]: The score, None if the board is not solved.
+        """
+        value = solve_board(board)
+        if value is None:
+            return None
+        if board.player != self.player:
+            value = -value
+        return board.utility(self.player) + value
+
+    def expand_leaves(self, board: PseudoBoard, is_max: bool) -> Eval:
+        """Evaluate all children of a node at once.
+
+        Args:
+            board (PseudoBoard): The board, its children are leaves.
+            is_max (bool): Is maximize player.
+
+        Returns:
+            Eval: The best move and its score.
+        """
+        evaluator = get_evaluator(board.layout)
+        (moves, scores, _) = evaluator.evaluate(
+            board,
+            self.player,
+            self.use_eval,
+        )
+        self.evaluated += len(moves)
+        if self.endgame:
+            for idx in np.flatnonzero(evaluator.solvable(board)):
+                board.play(*moves[idx])
+                scores[idx] = self.solved(board)
+                board.revert()
+        best = scores.argmax() if is_max else scores.argmin()
+        return Eval(move=moves[best], score=scores[best])
+
     def _search(self) -> Eval:
         """Search for the best move.
 
@@ -120,26 +441,310 @@ class MinimaxAgent(Agent):
             Eval: The best move and its score.
         """
         self.evaluated = 0
+        self.probes = self.researches = self.aspiration_fails = 0
+        self.passes = 0
+        if self.table is not None:
+            self.table.new_search()
+
+        if self.endgame:
+            move = endgame_move(self.board)
+            if move is not None:
+                LOGGER.debug('Solved endgame')
+                return Eval(
+                    move=move,
+                    score=self.board.utility(self.player) +
+                    solve_board(self.board),
+                )
 
         moves = len(self.board.available_moves())
-        if moves > 18:
-            self.max_depth = 4
-        elif moves > 14:
-            self.max_depth = 5
-        elif moves > 10:
-            self.max_depth = 6
+        if self.depth is not None:
+            res = self.drive(self.depth)
+        elif self.iterative:
+            res = self.deepen(moves)
         else:
-            self.max_depth = 8
+            res = self.drive(depth_schedule(moves))
 
-        res = self.minimax(self.board, MIN, MAX, 0)
         LOGGER.debug(f'Evaluated {self.evaluated} states')
+        if self.table is not None:
+            LOGGER.debug(self.table.stats())
+        if self.eval_cache is not None:
+            LOGGER.debug(self.eval_cache.stats())
+        if self.pvs:
+            LOGGER.debug(self.pvs_stats())
+        if self.passes:
+            LOGGER.debug(f'MTD(f) passes: {self.passes}')
+        return res
+
+    def pvs_stats(self) -> str:
+        """Describe how often null window probes had to be searched again.
+
+        Returns:
+            str: Probes, re-searches and failed aspiration windows.
+        """
+        rate = self.researches / self.probes if self.probes else 0.0
+        return (
+            f'PVS probes: {self.probes}, re-searched: {self.researches} '
+            f'({rate:.1%}), aspiration fails: {self.aspiration_fails}'
+        )
+
+    def deepen(self, moves: int) -> Eval:
+        """Search with depth 1, 2, 3, ... until timeout.
+
+        The result of an iteration cut by timeout is discarded, the best
+        move of the last completed iteration is searched first by the next.
+        No iteration is started past the soft limit of the deadline.
+
+        Args:
+            moves (int): Number of available moves, the maximum depth.
+
+        Returns:
+            Eval: The best move and its score of the deepest iteration.
+        """
+        res: Eval = None
+        self.pv_move = None
+        self.completed_depth = 0
+        self.depth_times: List[float] = []
+        start = time()
+        for depth in range(1, moves + 1):
+            curr = self.drive(depth, res.score if res is not None else None)
+            if self.timeout:
+                break
+            res = curr
+            self.pv_move = res.move
+            self.completed_depth = depth
+            self.depth_times.append(time() - start)
+            LOGGER.debug(
+                f'Depth {depth}: best move {res.move}, eval {res.score}',
+                verbose=True,
+            )
+            if self.deadline.soft_expired():
+                break
+        LOGGER.debug(f'Completed depth {self.completed_depth}')
         return res
 
+    def drive(self, depth: int, guess: Optional[float] = None) -> Eval:
+        """Search the root up to a depth with the selected driver.
+
+        Args:
+            depth (int): Depth to search.
+            guess (Optional[float], optional): Score of the previous
+                iteration, if any. Defaults to None.
+
+        Returns:
+            Eval: The best move and its score.
+        """
+        if self.workers == 1:
+            if self.mtdf:
+                return self.mtd(depth, guess)
+            if self.pvs and guess is not None:
+                return self.aspire(depth, guess)
+        return self.search_depth(depth)
+
+    def mtd(self, depth: int, guess: Optional[float] = None) -> Eval:
+        """Converge on the root score with null window searches, MTD(f).
+
+        Every pass tells if the score is below or above a bound, and the
+        table keeps the work of previous passes. Scores are integers, so
+        the bounds meet after a few passes.
+
+        Args:
+            depth (int): Depth to search.
+            guess (Optional[float], optional): First guess of the score,
+                the score of the root if None. Defaults to None.
+
+        Returns:
+            Eval: The best move and its score.
+        """
+        if guess is None:
+            guess = self.evaluate(self.board)
+        (lower, upper) = (MIN, MAX)
+        score = guess
+        best: Eval = None
+        while lower < upper:
+            beta = score + 1 if score == lower else score
+            res = self.search_depth(depth, beta - 1, beta)
+            self.passes += 1
+            if self.timeout:
+                return best or res
+            score = res.score
+            if score < beta:
+                upper = score
+            else:
+                # Only a fail high proves the move reaches the score
+                lower = score
+                best = res
+        return best or res
+
+    def aspire(self, depth: int, guess: float) -> Eval:
+        """Search the root in a window around a guess of its score.
+
+        The window is opened on the side the score falls out of, and the
+        root searched again.
+
+        Args:
+            depth (int): Depth to search.
+            guess (float): Score of the previous iteration.
+
+        Returns:
+            Eval: The best move and its score.
+        """
+        (alpha, beta) = (guess - ASPIRATION, guess + ASPIRATION)
+        while True:
+            res = self.search_depth(depth, alpha, beta)
+            if self.timeout:
+                return res
+            if res.score <= alpha:
+                alpha = MIN
+            elif res.score >= beta:
+                beta = MAX
+            else:
+                return res
+            self.aspiration_fails += 1
+
+    def ponder(self, limit: float = PONDER_TIME):
+        """Search a position of the opponent's turn until stopped.
+
+        Scores are for the player of the agent, so the root is a min node
+        and the table is filled with entries its next search can use.
+
+        Args:
+            limit (float, optional): Seconds before stopping on its own.
+                Defaults to PONDER_TIME.
+        """
+        self.deadline = Deadline(limit)
+        self.evaluated = 0
+        depth = 0
+        for depth in range(1, len(self.board.available_moves()) + 1):
+            self.max_depth = depth
+            self.minimax(
+                self.board, MIN, MAX, 0, self.board.player == self.player,
+            )
+            if self.timeout:
+                break
+        LOGGER.debug(f'Pondered {self.evaluated} states up to depth {depth}')
+
+    def search_depth(
+        self,
+        depth: int,
+        alpha: float = MIN,
+        beta: float = MAX,
+    ) -> Eval:
+        """Search the root up to a depth, in parallel if workers are set.
+
+        Args:
+            depth (int): Depth to search.
+            alpha (float, optional): The alpha value, only used by a
+                search in this process. Defaults to MIN.
+            beta (float, optional): The beta value, only used by a search
+                in this process. Defaults to MAX.
+
+        Returns:
+            Eval: The best move and its score.
+        """
+        self.max_depth = depth
+        if self.workers > 1:
+            return self.split()
+        return self.minimax(self.board, alpha, beta, 0)
+
+    def split(self) -> Eval:
+        """Search root moves over worker processes.
+
+        The first (best ordered) move is searched here to get an alpha
+        bound, then the other moves are searched by the workers of a pool
+        (young brothers wait). Workers share the best score found so far
+        as alpha, and stop at the same deadline as this search.
+
+        Returns:
+            Eval: The best move and its score.
+        """
+        board = self.board
+        moves = self.orderer.order(
+            board,
+            self.candidates(board, self.max_depth),
+            0,
+        )
+        if self.pv_move is not None and self.pv_move in moves:
+            moves.remove(self.pv_move)
+            moves.insert(0, self.pv_move)
+        if self.symmetry:
+            moves = board.symmetries.unique_moves(moves, board.tracker.edges)
+
+        action = moves[0]
+        board.play(*action)
+        try:
+            _, best = self.minimax(
+                board, MIN, MAX, 1, board.player == self.player,
+            )
+        except SearchTimeout:
+            return Eval(move=action, score=MIN)
+        finally:
+            board.revert()
+        if len(moves) == 1:
+            return Eval(move=action, score=best)
+
+        (pool, alpha) = get_pool(self.workers)
+        alpha.value = best
+        state = board.to_state()
+        options = {
+            'randomize': self.randomize,
+            'use_eval': self.use_eval,
+            'engine': self.engine,
+            'table_size': self.table_size,
+            'ordering': self.ordering,
+            'endgame': self.endgame,
+            'symmetry': self.symmetry,
+            'batch': self.batch,
+            'pvs': self.pvs,
+            'mtdf': self.mtdf,
+            'compress': self.compress,
+            'equivalence': self.equivalence,
+            'eval_cache_size': self.eval_cache_size,
+        }
+        tasks = [
+            SplitTask(
+                state,
+                move,
+                self.max_depth,
+                self.deadline.hard,
+                options,
+                self.search_id,
+            )
+            for move in moves[1:]
+        ]
+        for result in pool.imap_unordered(search_child, tasks):
+            self.evaluated += result.evaluated
+            if result.timeout:
+                # Tasks left are dropped, and return at once in the workers
+                self.deadline.stop()
+                break
+            if result.exact and result.score > best:
+                action = result.move
+                best = result.score
+        return Eval(move=action, score=best)
+
 
 class MinimaxBot(Bot):
     """Minimax bot class definition."""
 
-    def __init__(self, randomize=False, use_eval=True):
+    def __init__(
+        self,
+        randomize=False,
+        use_eval=True,
+        engine: Engine = 'numpy',
+        table_size=TABLE_SIZE,
+        iterative=True,
+        ordering=True,
+        workers=1,
+        endgame=True,
+        book=True,
+        symmetry=True,
+        reuse=True,
+        pvs=True,
+        mtdf=False,
+        compress=True,
+        equivalence=True,
+        eval_cache_size=EVAL_CACHE_SIZE,
+    ):
         """Initialize a minimax bot.
 
         Args:
@@ -147,9 +752,64 @@ class MinimaxBot(Bot):
                 Defaults to False.
             use_eval (bool, optional): Use heurisitics to evaluate.
                 Defaults to True.
+            engine (Engine, optional): Board engine to use.
+                Defaults to 'numpy'.
+            table_size (int, optional): Transposition table slots,
+                0 to disable it. Defaults to TABLE_SIZE.
+            iterative (bool, optional): Use iterative deepening.
+                Defaults to True.
+            ordering (bool, optional): Use move ordering.
+                Defaults to True.
+            workers (int, optional): Number of processes to search with.
+                Defaults to 1.
+            endgame (bool, optional): Solve chains and loops endgames.
+                Defaults to True.
+            book (bool, optional): Play moves of the opening book of the
+                board size, if there is one. Defaults to True.
+            symmetry (bool, optional): Share table entries between
+                symmetric positions. Defaults to True.
+            reuse (bool, optional): Keep the transposition table between
+                turns of a game. Defaults to True.
+            pvs (bool, optional): Use principal variation search.
+                Defaults to True.
+            mtdf (bool, optional): Search the root with MTD(f).
+                Defaults to False.
+            compress (bool, optional): Take boxes offered without a choice
+                at no depth. Defaults to True.
+            equivalence (bool, optional): Search one move of every class
+                of moves of the same value. Defaults to True.
+            eval_cache_size (int, optional): Leaf evaluations kept between
+                turns, 0 to disable it. Defaults to EVAL_CACHE_SIZE.
         """
         self.randomize = randomize
         self.use_eval = use_eval
+        self.engine = engine
+        self.table_size = table_size
+        self.iterative = iterative
+        self.ordering = ordering
+        self.workers = workers
+        self.endgame = endgame
+        self.book = book
+        self.symmetry = symmetry
+        self.reuse = reuse
+        self.pvs = pvs
+        self.mtdf = mtdf
+        self.compress = compress
+        self.equivalence = equivalence
+        self.eval_cache_size = eval_cache_size
+        # Kept between turns: table, side, state after the last move
+        self.table: Optional[TranspositionTable] = None
+        # Kept between games, entries are for a layout and a player
+        self.eval_cache: Optional[EvalCache] = None
+        self.player: Optional[Player] = None
+        self.expected: Optional[GameState] = None
+        self.ponderer: Optional[MinimaxAgent] = None
+        self.pondering: Optional[Thread] = None
+        # Pondering is started and stopped from the UI and search threads
+        self.ponder_lock = RLock()
+        self.searching: Optional[MinimaxAgent] = None
+        # Set by stop, until the next get_action
+        self.stop_event = Event()
 
     def get_action(self, state: GameState) -> GameAction:
         """Get the next action for minimax bot.
@@ -160,10 +820,336 @@ class MinimaxBot(Bot):
         Returns:
             GameAction: The next action.
         """
+        self.stop_event.clear()
+        return self.choose(state)
+
+    def get_actions(self, states: List[GameState]) -> List[GameAction]:
+        """Get the next actions of many games.
+
+        Games of the same board size and side to move share a
+        transposition table, as scores in a table are for the side of its
+        root, so positions met by several games are searched once, and
+        games in the same position share their action.
+
+        Args:
+            states (List[GameState]): States of the games.
+
+        Returns:
+            List[GameAction]: Next action of every game, in order.
+        """
+        self.stop_event.clear()
+        tables: Dict[Tuple[Layout, Player], TranspositionTable] = {}
+        found: Dict[Tuple[Layout, int, bool], GameAction] = {}
+        actions = []
+        for state in states:
+            layout = layout_of(state)
+            key = (layout, layout.edges_of(state), state.player1_turn)
+            if key not in found:
+                table = None
+                if self.table_size:
+                    side = (layout, Player.of(state.player1_turn))
+                    if side not in tables:
+                        tables[side] = TranspositionTable(self.table_size)
+                    table = tables[side]
+                found[key] = self.choose(state, table)
+            actions.append(found[key])
+        # The games do not follow each other
+        self.expected = None
+        return actions
+
+    def choose(
+        self,
+        state: GameState,
+        table: Optional[TranspositionTable] = None,
+    ) -> GameAction:
+        """Get the next action, from the book or by searching.
+
+        Args:
+            state (GameState): The current state of the game.
+            table (Optional[TranspositionTable], optional): Table to
+                search with, a new one if None. Defaults to None.
+
+        Returns:
+            GameAction: The next action.
+        """
+        self.stop_pondering()
+        if table is None and self.reuse and self.table_size:
+            table = self.kept_table(state)
+
+        if self.book:
+            entry = lookup_book(state)
+            if entry is not None:
+                LOGGER.debug(f'Book move: {entry.move}. Eval: {entry.score}')
+                return self.played(state, entry.move)
+
         start = time()
-        agent = MinimaxAgent(state, self.randomize)
+        agent = self.make_agent(state, table)
+        self.searching = agent
         move, evaluate = agent.search()
+        self.searching = None
         dur = round(time() - start, 2)
         LOGGER.debug(f'Best move: {move}. Eval: {evaluate}')
         LOGGER.perf(f'Thinking time: {dur}s')
-        return GameAction(move[0], move[1])
+        return self.played(state, Move(move[0], move[1][::-1]))
+
+    def make_agent(
+        self,
+        state: GameState,
+        table: Optional[TranspositionTable],
+    ) -> MinimaxAgent:
+        """Create an agent with the options of the bot.
+
+        Args:
+            state (GameState): The state to search.
+            table (Optional[TranspositionTable]): Table to search with, a
+                new one if None.
+
+        Returns:
+            MinimaxAgent: The agent.
+        """
+        agent = MinimaxAgent(
+            state,
+            self.randomize,
+            self.use_eval,
+            self.engine,
+            0 if table is not None else self.table_size,
+            self.iterative,
+            self.ordering,
+            workers=self.workers,
+            endgame=self.endgame,
+            symmetry=self.symmetry,
+            pvs=self.pvs,
+            mtdf=self.mtdf,
+            compress=self.compress,
+            equivalence=self.equivalence,
+            eval_cache_size=0,
+        )
+        agent.stop_event = self.stop_event
+        if table is not None:
+            agent.table_size = self.table_size
+            agent.table = table
+        if self.eval_cache_size:
+            if self.eval_cache is None or not self.reuse:
+                self.eval_cache = EvalCache(self.eval_cache_size)
+            agent.eval_cache_size = self.eval_cache_size
+            agent.eval_cache = self.eval_cache
+        return agent
+
+    def played(self, state: GameState, move: Move) -> GameAction:
+        """Remember the state after a move of the bot.
+
+        Args:
+            state (GameState): The state the move is played in.
+            move (Move): The move (PseudoBoard position).
+
+        Returns:
+            GameAction: The action of the move.
+        """
+        if self.reuse:
+            board = make_board(state, self.engine)
+            board.play(*move)
+            self.expected = board.to_state()
+        return GameAction(move.orientation, move.position[::-1])
+
+    def opponent_moves(self, state: GameState) -> Optional[List[Move]]:
+        """Find the lines drawn since the last move of the bot.
+
+        Args:
+            state (GameState): The current state of the game.
+
+        Returns:
+            Optional[List[Move]]: The moves (PseudoBoard positions), None
+                if the state does not follow the last move, like a new game.
+        """
+        if self.expected is None:
+            return None
+        moves = []
+        for orientation in ('row', 'col'):
+            before = self.expected.status(orientation)
+            after = state.status(orientation)
+            if before.shape != after.shape or (before > after).any():
+                return None
+            moves.extend(
+                Move(orientation, (int(x), int(y)))
+                for (x, y) in zip(*(after > before).nonzero())
+            )
+        return moves
+
+    def kept_table(self, state: GameState) -> TranspositionTable:
+        """Get the table kept from the previous turns of the game.
+
+        A new table is made for a new game or when the bot changes side,
+        as scores in the table are for its side.
+
+        Args:
+            state (GameState): The current state of the game.
+
+        Returns:
+            TranspositionTable: The table.
+        """
+        player = Player.of(state.player1_turn)
+        moves = self.opponent_moves(state)
+        if self.table is None or player != self.player or moves is None:
+            self.table = TranspositionTable(self.table_size)
+            self.player = player
+        else:
+            LOGGER.debug(f'Opponent moves: {moves}, table kept')
+        return self.table
+
+    def ponder(self, state: GameState):
+        """Search in the background during the opponent's turn.
+
+        The kept table is filled for the positions the opponent may leave,
+        so the next search starts from warm entries. Pondering stops at
+        the next call of get_action.
+
+        Args:
+            state (GameState): State of the opponent's turn.
+        """
+        with self.ponder_lock:
+            self.stop_pondering()
+            if (
+                self.table is None or
+                Player.of(state.player1_turn) == self.player or
+                self.opponent_moves(state) is None
+            ):
+                return
+            agent = self.make_agent(state, self.table)
+            agent.workers = 1
+            agent.player = self.player
+            self.ponderer = agent
+            self.pondering = Thread(target=agent.ponder, daemon=True)
+            self.pondering.start()
+
+    def progress(self) -> int:
+        """Count states evaluated by the running search.
+
+        Returns:
+            int: Number of evaluated states, 0 if not searching.
+        """
+        agent = self.searching
+        return getattr(agent, 'evaluated', 0) if agent is not None else 0
+
+    def stop(self):
+        """Stop the running search early and the background search.
+
+        A search about to start is stopped as soon as it starts.
+        """
+        self.stop_event.set()
+        agent = self.searching
+        if agent is not None:
+            agent.force_stop()
+        self.stop_pondering()
+
+    def stop_pondering(self):
+        """Stop the background search, if any."""
+        with self.ponder_lock:
+            if self.pondering is not None:
+                self.ponderer.force_stop()
+                self.pondering.join()
+                self.pondering = None
+                self.ponderer = None
+
+
+def search_child(task: SplitTask) -> SplitResult:
+    """Search a root move in a worker process.
+
+    A score above the shared alpha is exact and raises it, a lower score
+    is only an upper bound of the move.
+
+    Args:
+        task (SplitTask): The root move to search.
+
+    Returns:
+        SplitResult: The score of the move.
+    """
+    if monotonic() >= task.deadline:
+        # Left over from a timed out search
+        return SplitResult(task.move, MIN, False, True, 0)
+    agent = MinimaxAgent(task.state, table_size=0, **{
+        key: value
+        for key, value in task.options.items()
+        if key != 'table_size'
+    })
+    agent.table = worker_table(task.options['table_size'], task.search_id)
+    agent.shared = shared_alpha()
+    agent.max_depth = task.depth
+    agent.evaluated = 0
+    agent.deadline = Deadline(task.deadline - monotonic())
+
+    board = agent.board
+    board.play(*task.move)
+    try:
+        _, score = agent.minimax(
+            board,
+            agent.shared.value,
+            MAX,
+            1,
+            board.player == agent.player,
+        )
+    except SearchTimeout:
+        score = MIN
+    exact = not agent.timeout and raise_alpha(agent.shared, score)
+    return SplitResult(task.move, score, exact, agent.timeout, agent.evaluated)
+
+
+def ordering_gain(state: GameState, depth: int, **kwargs) -> Tuple[int, int]:
+    """Count searched nodes of a fixed depth search with and without ordering.
+
+    Args:
+        state (GameState): State of the game to search.
+        depth (int): Depth to search.
+        kwargs: Other options of MinimaxAgent.
+
+    Returns:
+        Tuple[int, int]: Number of evaluated states with and without ordering.
+    """
+    nodes = []
+    for ordering in (True, False):
+        agent = MinimaxAgent(state, ordering=ordering, depth=depth, **kwargs)
+        agent.thinking_time = math.inf
+        agent.search()
+        nodes.append(agent.evaluated)
+    LOGGER.perf(f'Ordered: {nodes[0]} states, unordered: {nodes[1]} states')
+    return (nodes[0], nodes[1])
+
+
+def pvs_gain(state: GameState, depth: int, **kwargs) -> Tuple[int, int]:
+    """Count searched nodes of a fixed depth search with and without PVS.
+
+    Args:
+        state (GameState): State of the game to search.
+        depth (int): Depth to search.
+        kwargs: Other options of MinimaxAgent.
+
+    Returns:
+        Tuple[int, int]: Number of evaluated states with and without PVS.
+    """
+    nodes = []
+    for pvs in (True, False):
+        agent = MinimaxAgent(state, pvs=pvs, depth=depth, **kwargs)
+        agent.thinking_time = math.inf
+        agent.search()
+        nodes.append(agent.evaluated)
+        if pvs:
+            LOGGER.perf(agent.pvs_stats())
+    LOGGER.perf(f'PVS: {nodes[0]} states, alpha-beta: {nodes[1]} states')
+    return (nodes[0], nodes[1])
+
+
+def depth_schedule(moves: int) -> int:
+    """Get fixed search depth from number of available moves.
+
+    The more moves available, the shallower the search, so that larger
+    boards are searched within the same time.
+
+    Args:
+        moves (int): Number of available moves.
+
+    Returns:
+        int: Search depth.
+    """
+    for (threshold, depth) in DEPTH_SCHEDULE:
+        if moves > threshold:
+            return depth
+    return 8
@@ -0,0 +1,116 @@
+"""Move ordering for alpha-beta search."""
+from typing import Dict, List
+
+from datatypes import Move, Moves
+from pseudoboard import PseudoBoard
+
+CAPTURE = 0
+SAFE = 1
+SACRIFICE = 2
+
+KILLER_SLOTS = 2
+
+
+class NullOrderer(object):
+    """
+    An orderer that keeps moves as generated.
+
+    Inherit this to create your own move orderers.
+    """
+
+    def order(self, board: PseudoBoard, moves: Moves, ply: int) -> Moves:
+        """Order moves to be searched.
+
+        Args:
+            board (PseudoBoard): The current board.
+            moves (Moves): Available moves of the board.
+            ply (int): Distance of the board from the root.
+
+        Returns:
+            Moves: Moves in search order.
+        """
+        return moves
+
+    def cutoff(self, move: Move, ply: int, depth: int):
+        """Record a move that caused a beta cutoff.
+
+        Args:
+            move (Move): The move.
+            ply (int): Distance of the board from the root.
+            depth (int): Remaining depth searched below the board.
+        """
+
+
+class MoveOrderer(NullOrderer):
+    """
+    Order moves by class, then killer moves, then history heuristic.
+
+    Sorting is stable, so ties keep the order moves are generated in.
+
+    Classes, searched in this order:
+        capture = completes a square
+        safe = does not create a 3-sided square
+        sacrifice = creates a 3-sided square for the opponent
+    """
+
+    def __init__(self):
+        """Initialize empty killer and history tables."""
+        self.killers: List[Moves] = []
+        self.history: Dict[Move, int] = {}
+
+    def order(self, board: PseudoBoard, moves: Moves, ply: int) -> Moves:
+        """Order moves to be searched.
+
+        Args:
+            board (PseudoBoard): The current board.
+            moves (Moves): Available moves of the board.
+            ply (int): Distance of the board from the root.
+
+        Returns:
+            Moves: Moves in search order.
+        """
+        killers = self.killers[ply] if ply < len(self.killers) else []
+        history = self.history
+
+        def rank(move: Move):
+            return (
+                move_class(board, move),
+                move not in killers,
+                -history.get(move, 0),
+            )
+
+        return sorted(moves, key=rank)
+
+    def cutoff(self, move: Move, ply: int, depth: int):
+        """Record a move that caused a beta cutoff.
+
+        Args:
+            move (Move): The move.
+            ply (int): Distance of the board from the root.
+            depth (int): Remaining depth searched below the board.
+        """
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLER_SLOTS:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+
+def move_class(board: PseudoBoard, move: Move) -> int:
+    """Classify a move.
+
+    Args:
+        board (PseudoBoard): The current board.
+        move (Move): Move to classify.
+
+    Returns:
+        int: CAPTURE, SAFE or SACRIFICE.
+    """
+    openings = min(board.edge_openings(move[0], move[1]))
+    if openings == 1:
+        return CAPTURE
+    elif openings == 2:
+        return SACRIFICE
+    return SAFE
@@ -0,0 +1,171 @@
+"""Opening book of deep searched early positions.
+
+The rest of a game only depends on the marked lines, not on who owns the
+boxes, so positions are keyed by their edges bitmask and give the best
+move and the score to come for the player to move. Symmetric positions
+share one record, keyed by the smallest of their images.
+
+Book file (little endian): a header with magic, rows, cols and number of
+records, then the records (edges, move edge index, score) sorted by
+edges, binary searched through a memory map.
+
+Books are generated by book_generator.py.
+"""
+import mmap
+import os
+import struct
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from datatypes import BookEntry
+from GameState import GameState
+from layout import get_layout, layout_of
+from symmetry import get_symmetries
+
+MAGIC = b'DBOB'
+HEADER = struct.Struct('<4sBBxxI')
+RECORD = struct.Struct('<QBb')
+BOOK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'books')
+
+# (edges, move edge index, score)
+Record = Tuple[int, int, int]
+
+
+class OpeningBook(object):
+    """A read only opening book file, memory mapped."""
+
+    def __init__(self, path: str):
+        """Open a book file.
+
+        Args:
+            path (str): Path of the file.
+
+        Raises:
+            ValueError: If the file is not an opening book.
+        """
+        with open(path, 'rb') as book:
+            self.data = mmap.mmap(book.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, rows, cols, count) = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an opening book')
+        self.layout = get_layout(rows, cols)
+        self.symmetries = get_symmetries(rows, cols)
+        self.count = count
+
+    def __len__(self) -> int:
+        """Count records.
+
+        Returns:
+            int: Number of records.
+        """
+        return self.count
+
+    def record(self, idx: int) -> Record:
+        """Read a record.
+
+        Args:
+            idx (int): Index of the record.
+
+        Returns:
+            Record: The record.
+        """
+        return RECORD.unpack_from(self.data, HEADER.size + idx * RECORD.size)
+
+    def find(self, edges: int) -> Optional[Record]:
+        """Binary search the record of canonical edges.
+
+        Args:
+            edges (int): Canonical edges bitmask.
+
+        Returns:
+            Optional[Record]: The record, None if not in the book.
+        """
+        (low, high) = (0, self.count)
+        while low < high:
+            mid = (low + high) // 2
+            record = self.record(mid)
+            if record[0] == edges:
+                return record
+            elif record[0] < edges:
+                low = mid + 1
+            else:
+                high = mid
+        return None
+
+    def lookup(self, state: GameState) -> Optional[BookEntry]:
+        """Get the book answer of a game state.
+
+        Args:
+            state (GameState): The game state.
+
+        Returns:
+            Optional[BookEntry]: Best move (PseudoBoard position) and
+                score to come, None if not in the book.
+        """
+        (key, sym) = self.symmetries.canonical(self.layout.edges_of(state))
+        record = self.find(key)
+        if record is None:
+            return None
+        move = self.layout.moves[self.symmetries.inverse[sym][record[1]]]
+        return BookEntry(move=move, score=record[2])
+
+    def close(self):
+        """Close the memory map."""
+        self.data.close()
+
+
+def book_path(rows: int, cols: int) -> str:
+    """Get the default path of the book of a board size.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+
+    Returns:
+        str: Path of the book.
+    """
+    return os.path.join(BOOK_DIR, f'{rows}x{cols}.book')
+
+
+@lru_cache(maxsize=None)
+def load_book(rows: int, cols: int) -> Optional[OpeningBook]:
+    """Open the (cached) default book of a board size.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+
+    Returns:
+        Optional[OpeningBook]: The book, None if there is no book file.
+    """
+    path = book_path(rows, cols)
+    return OpeningBook(path) if os.path.exists(path) else None
+
+
+def lookup_book(state: GameState) -> Optional[BookEntry]:
+    """Get the answer of the default book of the board size.
+
+    Args:
+        state (GameState): The game state.
+
+    Returns:
+        Optional[BookEntry]: The book answer, None if not in the book.
+    """
+    layout = layout_of(state)
+    book = load_book(layout.rows, layout.cols)
+    return book.lookup(state) if book is not None else None
+
+
+def write_book(path: str, rows: int, cols: int, records: List[Record]):
+    """Write a book file.
+
+    Args:
+        path (str): Path of the file.
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+        records (List[Record]): Records, sorted by edges.
+    """
+    with open(path, 'wb') as book:
+        book.write(HEADER.pack(MAGIC, rows, cols, len(records)))
+        for record in records:
+            book.write(RECORD.pack(*record))
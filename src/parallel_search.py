@@ -0,0 +1,152 @@
+"""Worker processes shared by parallel searches."""
+import math
+import os
+from functools import lru_cache
+from itertools import count
+from multiprocessing import Pool, Value, current_process
+from multiprocessing.pool import Pool as PoolType
+from multiprocessing.sharedctypes import Synchronized
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from datatypes import Move
+from GameState import GameState
+from transposition import TranspositionTable
+
+# Alpha bound shared by the processes of a pool, set by init_worker
+SHARED: Dict[str, Synchronized] = {}
+# Root search each worker table was filled by, by table size
+FILLED_BY: Dict[int, Tuple[int, int]] = {}
+# Root searches started by this process
+SEARCHES = count()
+
+
+class SplitTask(NamedTuple):
+    """A root move to be searched by a worker."""
+
+    state: GameState
+    move: Move
+    depth: int
+    # Hard limit on the monotonic clock, shared by the processes
+    deadline: float
+    options: Dict[str, Any]
+    # Root search the move belongs to, see new_search_id
+    search_id: Tuple[int, int]
+
+
+class SplitResult(NamedTuple):
+    """Result of a root move searched by a worker."""
+
+    move: Move
+    score: float
+    exact: bool
+    timeout: bool
+    evaluated: int
+
+
+def init_worker(alpha: Synchronized):
+    """Set up a worker process.
+
+    Args:
+        alpha (Synchronized): Alpha bound shared by the pool.
+    """
+    SHARED['alpha'] = alpha
+
+
+def can_fork() -> bool:
+    """Check if this process can start worker processes.
+
+    Workers of a pool (e.g. the match runner) are daemonic and are not
+    allowed to have children.
+
+    Returns:
+        bool: True if a pool can be started.
+    """
+    return not current_process().daemon
+
+
+@lru_cache(maxsize=None)
+def get_pool(workers: int) -> Tuple[PoolType, Synchronized]:
+    """Get the (cached) pool of a number of workers and its shared alpha.
+
+    Args:
+        workers (int): Number of worker processes.
+
+    Returns:
+        Tuple[PoolType, Synchronized]: The pool and its alpha bound.
+    """
+    alpha = Value('d', -math.inf)
+    return (Pool(workers, init_worker, (alpha,)), alpha)
+
+
+def shared_alpha() -> Optional[Synchronized]:
+    """Get the alpha bound shared with the other workers.
+
+    Returns:
+        Optional[Synchronized]: The alpha bound, None outside of a worker.
+    """
+    return SHARED.get('alpha')
+
+
+def raise_alpha(alpha: Synchronized, score: float) -> bool:
+    """Raise a shared alpha bound to a score if it is higher.
+
+    Args:
+        alpha (Synchronized): The alpha bound.
+        score (float): Score found by a worker.
+
+    Returns:
+        bool: True if the score raised the bound.
+    """
+    with alpha.get_lock():
+        if score > alpha.value:
+            alpha.value = score
+            return True
+    return False
+
+
+def new_search_id() -> Tuple[int, int]:
+    """Get an id of a root search, unique among the processes.
+
+    Returns:
+        Tuple[int, int]: Process id and number of the search.
+    """
+    return (os.getpid(), next(SEARCHES))
+
+
+@lru_cache(maxsize=None)
+def sized_table(size: int) -> TranspositionTable:
+    """Get the (cached) table of a worker for a number of slots.
+
+    Args:
+        size (int): Number of slots.
+
+    Returns:
+        TranspositionTable: The table.
+    """
+    return TranspositionTable(size)
+
+
+def worker_table(
+    size: int,
+    search_id: Tuple[int, int],
+) -> Optional[TranspositionTable]:
+    """Get the transposition table of a worker, kept between tasks.
+
+    Scores in a table are for the side of the root and depend on the
+    search options, so the table is only kept between tasks of the same
+    root search, and cleared when a task of another one comes.
+
+    Args:
+        size (int): Number of slots, 0 for no table.
+        search_id (Tuple[int, int]): Root search of the task.
+
+    Returns:
+        Optional[TranspositionTable]: The table.
+    """
+    if not size:
+        return None
+    table = sized_table(size)
+    if FILLED_BY.get(size) != search_id:
+        table.clear()
+        FILLED_BY[size] = search_id
+    return table
@@ -0,0 +1,212 @@
+"""Perfect play from an exhaustive solve of small boards.
+
+The rest of a game only depends on the marked lines, so the value of a
+position for the player to move (boxes to come minus the opponent's) is
+a function of the edges bitmask:
+    V(full) = 0
+    V(s) = max over free edges e of
+        k + V(s | e)  if e completes k > 0 boxes (same player moves again)
+        -V(s | e)     otherwise (the opponent moves)
+Values are computed backwards from the full board, one layer of edge
+count at a time, and stored as a dense int8 array indexed by bitmask
+(16 MB for the 24 lines of a 3x3 board).
+
+Solve the default board with:
+    python perfect_agent.py --size 3 3
+"""
+import argparse
+import os
+from functools import lru_cache
+from time import perf_counter
+
+import numpy as np
+
+from Bot import Bot
+from GameAction import GameAction
+from GameState import GameState
+from layout import Layout, get_layout, layout_of
+from logger import LOGGER
+from opening_book import BOOK_DIR
+
+# Largest number of lines solved (64 MB of values)
+MAX_EDGES = 26
+# Largest number of lines solved when needed instead of loaded (2x3 boards
+# take under a second)
+SOLVE_EDGES = 20
+
+
+def solution_path(rows: int, cols: int) -> str:
+    """Get the path of the solution of a board size.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+
+    Returns:
+        str: Path of the solution.
+    """
+    return os.path.join(BOOK_DIR, f'{rows}x{cols}.solved.npy')
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """Count set bits of 32 bits integers.
+
+    Args:
+        values (np.ndarray): The integers.
+
+    Returns:
+        np.ndarray: Number of set bits of each.
+    """
+    table = np.array([bin(byte).count('1') for byte in range(256)], np.uint8)
+    counts = np.zeros(values.shape, np.uint8)
+    for shift in range(0, 32, 8):
+        counts += table[(values >> shift) & 0xFF]
+    return counts
+
+
+def solve(layout: Layout) -> np.ndarray:
+    """Compute the value of every edges bitmask of a board.
+
+    Args:
+        layout (Layout): Layout of the board.
+
+    Returns:
+        np.ndarray: Value for the player to move, indexed by bitmask.
+    """
+    edges = layout.edge_count
+    if edges > MAX_EDGES:
+        raise ValueError(f'boards of more than {MAX_EDGES} lines are too big')
+    values = np.zeros(1 << edges, np.int8)
+    counts = popcount(np.arange(1 << edges, dtype=np.uint32))
+    for count in range(edges - 1, -1, -1):
+        states = np.flatnonzero(counts == count).astype(np.uint32)
+        best = np.full(len(states), np.iinfo(np.int8).min, np.int8)
+        for edge in range(edges):
+            free = (states >> edge) & 1 == 0
+            children = states[free] | np.uint32(1 << edge)
+            captured = np.zeros(len(children), np.int8)
+            for tile in layout.edge_tiles[edge]:
+                mask = np.uint32(layout.tile_masks[tile])
+                captured += (children & mask) == mask
+            child_values = values[children]
+            scores = np.where(
+                captured > 0, captured + child_values, -child_values,
+            )
+            best[free] = np.maximum(best[free], scores)
+        values[states] = best
+    return values
+
+
+@lru_cache(maxsize=None)
+def load_solution(rows: int, cols: int) -> np.ndarray:
+    """Load the (cached) solution of a board size, memory mapped.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+
+    Raises:
+        FileNotFoundError: If the board has not been solved.
+
+    Returns:
+        np.ndarray: Value for the player to move, indexed by bitmask.
+    """
+    path = solution_path(rows, cols)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f'{path} not found, solve the board with: '
+            f'python perfect_agent.py --size {rows} {cols}',
+        )
+    return np.load(path, mmap_mode='r')
+
+
+@lru_cache(maxsize=None)
+def get_solution(rows: int, cols: int) -> np.ndarray:
+    """Get the (cached) solution of a board size, solved if small enough.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+
+    Raises:
+        ValueError: If the board is too big to be solved.
+        FileNotFoundError: If the board needs to be solved beforehand.
+
+    Returns:
+        np.ndarray: Value for the player to move, indexed by bitmask.
+    """
+    layout = get_layout(rows, cols)
+    if layout.edge_count > MAX_EDGES:
+        raise ValueError(f'{rows}x{cols} boards are too big to be solved')
+    if layout.edge_count <= SOLVE_EDGES:
+        return solve(layout)
+    return load_solution(rows, cols)
+
+
+class PerfectBot(Bot):
+    """A bot playing perfectly from the solution of the board."""
+
+    def prepare(self, rows: int, cols: int):
+        """Solve or load the solution of a board size.
+
+        Args:
+            rows (int): Number of tile rows.
+            cols (int): Number of tile columns.
+        """
+        get_solution(rows, cols)
+
+    def get_action(self, state: GameState) -> GameAction:
+        """Get the move of highest value.
+
+        Args:
+            state (GameState): The current state of the game.
+
+        Returns:
+            GameAction: The next action.
+        """
+        layout = layout_of(state)
+        values = get_solution(layout.rows, layout.cols)
+        edges = layout.edges_of(state)
+        best = None
+        for idx in range(layout.edge_count):
+            if edges >> idx & 1:
+                continue
+            child = edges | 1 << idx
+            captured = sum(
+                child & layout.tile_masks[tile] == layout.tile_masks[tile]
+                for tile in layout.edge_tiles[idx]
+            )
+            value = int(values[child])
+            score = captured + value if captured else -value
+            if best is None or score > best[0]:
+                best = (score, idx)
+        (score, idx) = best
+        (orientation, position) = layout.moves[idx]
+        LOGGER.debug(f'Perfect move: {layout.moves[idx]}. Eval: {score}')
+        return GameAction(orientation, position[::-1])
+
+
+def main():
+    """Solve a board from the command line."""
+    parser = argparse.ArgumentParser(description='Solve a small board.')
+    parser.add_argument(
+        '--size', type=int, nargs=2, default=(3, 3), metavar=('ROWS', 'COLS'),
+        help='number of box rows and columns',
+    )
+    parser.add_argument('--output', help='path of the solution file')
+    args = parser.parse_args()
+    (rows, cols) = args.size
+
+    start = perf_counter()
+    values = solve(get_layout(rows, cols))
+    path = args.output or solution_path(rows, cols)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.save(path, values)
+    LOGGER.log(
+        f'Solved {len(values)} positions in {perf_counter() - start:.1f}s, '
+        f'empty board value: {values[0]}, written to {path}',
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,17 @@
 """PseudoBoard class definition and helper."""
 from random import shuffle
-from typing import List
+from typing import List, Optional, Tuple
 
 from numpy import ndarray
 
-from datatypes import (Chain, Chains, Flag, Flags, Loops, Move, Moves,
-                       Orientation, Position, Square, Tile, Tiles)
+from chains import (FREE, HOSCS, LEN_HOSCS, LEN_OLCS, LOOPS, NOLCS, NOSCS,
+                    OLCS, OSCS, ChainTracker)
+from datatypes import (Chains, Component, Loops, Move, Moves, Orientation,
+                       Position, Square, Tile)
 from GameState import GameState
+from layout import layout_of
 from player import Player
+from symmetry import SymmetricHash, Symmetries, get_symmetries
 
 
 class PseudoBoard(object):
@@ -46,10 +50,16 @@ class PseudoBoard(object):
         """
         self.state = state
         self.player1_turn = state.player1_turn
-        self._loops: Loops = []
-        self._chains: Chains = []
-        self.dirty = True
-        self.chain_part: Flag = [False for _ in range(9)]
+        self.layout = layout_of(state)
+        edges = self.layout.edges_of(state)
+        self.hash = self.layout.hash_of(
+            edges,
+            [self.layout.boxes_of(state, p.score()) for p in Player],
+            self.player1_turn,
+        )
+        self.tracker = ChainTracker(self.layout, edges)
+        self.symmetries: Optional[Symmetries] = None
+        self.symmetric: Optional[SymmetricHash] = None
         self.move_stack: Moves = []
         self.square_stack: List[Square] = []
 
@@ -59,22 +69,60 @@ class PseudoBoard(object):
         Returns:
             str: String representation of the board.
         """
+        rows = self.layout.rows
+        cols = self.layout.cols
         rep = ''
-        for i in range(4):
-            for j in range(3):
+        for i in range(rows + 1):
+            for j in range(cols):
                 rep += f'+{h_line(self.state.row_status[i, j])}'
             rep += '+\n'
 
-            if i < 3:
-                for k in range(4):
+            if i < rows:
+                for k in range(cols + 1):
                     rep += f'{v_line(self.state.col_status[i, k])} '
-                    if k < 3:
+                    if k < cols:
                         player = Player.of(self.state.board_status[i, k])
                         rep += f'{player_mark(player)} '
                 rep = rep[:-1] + '\n'
         rep += f'Player {self.player} to play'
         return rep
 
+    def to_state(self) -> GameState:
+        """Build a game state of the current board.
+
+        Returns:
+            GameState: Copy of current game state.
+        """
+        return GameState(
+            self.state.board_status.copy(),
+            self.state.row_status.copy(),
+            self.state.col_status.copy(),
+            self.player1_turn,
+        )
+
+    def enable_symmetry(self):
+        """Keep hashes of the symmetric images of the board up to date."""
+        layout = self.layout
+        state = self.to_state()
+        self.symmetries = get_symmetries(layout.rows, layout.cols)
+        self.symmetric = SymmetricHash(
+            self.symmetries,
+            self.tracker.edges,
+            [layout.boxes_of(state, player.score()) for player in Player],
+        )
+
+    def canonical_key(self) -> Tuple[int, int]:
+        """Get the hash of the board shared by its symmetric images.
+
+        Returns:
+            Tuple[int, int]: The key, and the index of the symmetry mapping
+                the board to the image the key belongs to (0 if symmetry
+                is not enabled).
+        """
+        if self.symmetric is None:
+            return (self.hash, 0)
+        return self.symmetric.canonical(self.player1_turn)
+
     def play(
         self,
         orientation: Orientation,
@@ -90,44 +138,58 @@ class PseudoBoard(object):
         self.move_stack.append(Move(orientation, position))
         # Toggle status to one on that orientation and pos
         self.state.status(orientation)[position] = 1
+        layout = self.layout
+        edge = layout.edge_index[orientation, position]
+        self.hash ^= layout.edge_keys[edge]
+        symmetric = self.symmetric
+        if symmetric is not None:
+            symmetric.edge(edge)
         # Get player and square stack with this player
         player = self.player
         square = Square([], player)
         should_switch: bool = True
-        # For both side of row/col (two tiles)
-        for _ in range(2):
+        # For both side of row/col (one or two tiles)
+        for tile in layout.edge_tiles[edge]:
             # If the tile is creating a square,
             # Append it to square stack and don't switch player
             # (player can continue)
-            if is_valid_tile(position):
-                if self.openings_count(position) == 0:
-                    self.state.board_status[position] = player.score()
-                    square.tiles.append(position)
-                    should_switch = False
-            # Get next tile
-            if orientation == 'row':
-                position = (position[0] - 1, position[1])
-            else:
-                position = (position[0], position[1] - 1)
+            position = layout.tiles[tile]
+            if self.openings_count(position) == 0:
+                self.state.board_status[position] = player.score()
+                self.hash ^= layout.box_keys[player.value][tile]
+                if symmetric is not None:
+                    symmetric.box(player.value, tile)
+                square.tiles.append(position)
+                should_switch = False
         # Add the square to the square stack and player to turn stack
         self.square_stack.append(square)
         # Switch player if should
         if should_switch:
             self.switch()
-        # Set dirty after move
-        self.dirty = True
+        # Update chains around the edge
+        self.tracker.play(edge)
 
     def revert(self):
         """Revert the last move."""
         # Pop last move, toggle back to 0 that orientation and pos
         (orientation, position) = self.move_stack.pop()
         self.state.status(orientation)[position] = 0
+        edge = self.layout.edge_index[orientation, position]
+        self.hash ^= self.layout.edge_keys[edge]
+        symmetric = self.symmetric
+        if symmetric is not None:
+            symmetric.edge(edge)
+        self.tracker.revert()
 
         # Pop last square, reset board state or switch player
-        (positions, _) = self.square_stack.pop()
+        (positions, player) = self.square_stack.pop()
         if positions:  # Square created, revert all board state
             for pos in positions:
                 self.state.board_status[pos] = 0
+                tile = self.layout.tile_index(pos)
+                self.hash ^= self.layout.box_keys[player.value][tile]
+                if symmetric is not None:
+                    symmetric.box(player.value, tile)
         else:  # No square created, switch player
             self.switch()
 
@@ -142,6 +204,7 @@ class PseudoBoard(object):
     def switch(self):
         """Switch player to play."""
         self.player1_turn = not self.player1_turn
+        self.hash ^= self.layout.turn_key
 
     def objective(self, player: Player, use_eval=False) -> int:
         """Calculate objective value of the board for a player.
@@ -200,15 +263,9 @@ class PseudoBoard(object):
             +---+
 
         Returns:
-            int: _description_
+            int: Number of free squares.
         """
-        sq = 0
-        for x in range(3):
-            for y in range(3):
-                if self.openings_count((x, y)) == 1:
-                    if not self.chain_part[3 * x + y]:
-                        sq += 1
-        return sq
+        return self.tracker.counters[FREE]
 
     def chain_value(self) -> int:
         """Calculate total value of all chains.
@@ -224,30 +281,15 @@ class PseudoBoard(object):
         Returns:
             int: Total value of all chains.
         """
-        noscs = oscs = hoscs = nolcs = 0
-        olcs = len_olcs = len_hoscs = nolcs = 0
-        for chain in self.chains:
-            end1 = chain[0]
-            end2 = chain[-1]
-            a = self.openings_count(end1)
-            b = self.openings_count(end2)
-            length = len(chain)
-            if length == 2:
-                if a == 2 and b == 2:
-                    # Open short chain
-                    oscs += length
-                elif a == 2 or b == 2:
-                    hoscs += length
-                    len_hoscs += 1
-                else:
-                    noscs += length
-            else:
-                if a == 2 and b == 2:
-                    # Open long chain
-                    olcs += length
-                    len_olcs += 1
-                else:
-                    nolcs += length
+        # Chains are counted by the tracker as they change
+        counters = self.tracker.counters
+        noscs = counters[NOSCS]
+        oscs = counters[OSCS]
+        hoscs = counters[HOSCS]
+        len_hoscs = counters[LEN_HOSCS]
+        olcs = counters[OLCS]
+        len_olcs = counters[LEN_OLCS]
+        nolcs = counters[NOLCS]
 
         fac = -1 ** len_hoscs
         if len_olcs == 0:
@@ -263,9 +305,7 @@ class PseudoBoard(object):
         Returns:
             int: Negative value of total chains in every loop.
         """
-        if self.dirty:
-            self.calculate_chains()
-        return -sum([len(loop) for loop in self.loops])
+        return -self.tracker.counters[LOOPS]
 
     def squares(self, player: Player) -> int:
         """Calculate number of squares for a player.
@@ -289,14 +329,15 @@ class PseudoBoard(object):
         Returns:
             Moves: List of available moves.
         """
-        moves: Moves = []
-        size = [4, 3]
-        for orient in ('row', 'col'):
-            for x in range(size[0]):
-                for y in range(size[1]):
-                    if not self.state.status(orient)[x, y]:
-                        moves.append(Move(orient, (x, y)))
-            size.reverse()
+        row_status = self.state.row_status
+        col_status = self.state.col_status
+        moves: Moves = [
+            move
+            for move in self.layout.moves
+            if not (
+                row_status if move[0] == 'row' else col_status
+            )[move[1]]
+        ]
         # If randomize, shuffle moves
         if randomize:
             shuffle(moves)
@@ -322,101 +363,6 @@ class PseudoBoard(object):
         openings = self.openings_count(tile)
         return openings < 3 and openings != 0
 
-    def calculate_chains(self):
-        """Calculate chains in the board."""
-        self.chain_part = [False for _ in range(9)]
-        self._chains = []
-        self._loops = []
-        flags: Flags = [
-            [self.chainable((i, j)) for j in range(3)]
-            for i in range(3)
-        ]
-        # For each tiles
-        for x in range(3):
-            for y in range(3):
-                # If tile is chainable:
-                # Toggle chainable flag to false (it will not be used
-                # to expand chain), then expand chain for tile
-                if flags[x][y]:
-                    flags[x][y] = False
-                    chain = self.expand_chain((x, y), flags)
-                    # If tile can be chained with 2 or more tiles,
-                    # flag all of them as a chain part
-                    if len(chain) >= 2:
-                        for (i, j) in chain:
-                            self.chain_part[3 * i + j] = True
-                        # If chain length is >= 4 and first tile and last
-                        #   tile of the chain is connected, add it to loop
-                        # else, add it to chain
-                        if (
-                            len(chain) >= 4 and
-                            self.connected(chain[0], chain[-1])
-                        ):
-                            self._loops.append(chain)
-                        else:
-                            self._chains.append(chain)
-        # We precalculated it, so it's not dirty anymore
-        self.dirty = False
-
-    def expand_chain(self, start: Tile, flags: Flags) -> Chain:
-        """Expand chain from a tile.
-
-        Args:
-            start (Tile): Tile to start expanding chain from.
-            flags (Flags): Flags to check if a tile is chainable
-                or can be used to chain (not used by another chain).
-
-        Returns:
-            Chain: List of tiles in the chain.
-        """
-        # Expand a chainable `start` tile to form a chain of tiles
-        tile = start
-        chain = [start]
-        neighbors = get_neighbors(tile)
-        chained = True
-        # We count for chainable neighbor (with max of 2)
-        chainables = 0
-        for nbor in neighbors:
-            if self.chainable(nbor):
-                chainables += 1
-                if chainables > 1:
-                    break
-        # For each chainables attempt
-        for _ in range(chainables):
-            while chained:
-                chained = False
-                # For each neighbor
-                for neighbor in neighbors:
-                    (x, y) = neighbor
-                    # if neighbor is already chained, or neighbor is not
-                    # connected to current tile, or not chainable, skip
-                    if (
-                        not flags[x][y] or
-                        not self.connected(tile, neighbor) or
-                        not self.chainable(neighbor)
-                    ):
-                        continue
-                    # Neighbor can be chained!
-                    # toggle neighbor flag to false (already chained),
-                    # toggle chained, and add neighbor to chain list
-                    flags[x][y] = False
-                    chained = True
-                    chain.append(neighbor)
-                    # Continue to expand chain with current tile = neighbor,
-                    # get its neighbors, and skip other neighbors
-                    tile = neighbor
-                    neighbors = get_neighbors(tile)
-                    break
-            # Case of start is not an end of the chain, not making a loop:
-            # we can chain start tile with its other neighbor
-            # (remember, flag is already toggled to false if already used
-            #  to chain, so we can't use it again)
-            chained = True
-            chain.reverse()
-            tile = start
-            neighbors = get_neighbors(tile)
-        return chain
-
     def connected(self, tile1: Tile, tile2: Tile) -> bool:
         """Check if 2 tiles are connected.
 
@@ -475,6 +421,40 @@ class PseudoBoard(object):
         ])
         return 4 - closings
 
+    def edge_openings(
+        self,
+        orientation: Orientation,
+        position: Position,
+    ) -> List[int]:
+        """Count number of openings in the tiles sharing an edge.
+
+        Args:
+            orientation (Orientation): Orientation of the edge.
+            position (Position): Position of the edge.
+
+        Returns:
+            List[int]: Number of openings of each tile of the edge.
+        """
+        layout = self.layout
+        return [
+            self.openings_count(layout.tiles[tile])
+            for tile in layout.edge_tiles[layout.edge_index[
+                orientation, position
+            ]]
+        ]
+
+    def tiles_of(self, components: List[Component]) -> Chains:
+        """Convert tracked components to lists of tiles.
+
+        Args:
+            components (List[Component]): Components to convert.
+
+        Returns:
+            Chains: Tiles of every component.
+        """
+        tiles = self.layout.tiles
+        return [[tiles[tile] for tile in comp.tiles] for comp in components]
+
     @property
     def player(self) -> Player:
         """Get current player.
@@ -491,9 +471,7 @@ class PseudoBoard(object):
         Returns:
             Chains: List of chains in the board.
         """
-        if self.dirty:
-            self.calculate_chains()
-        return self._chains
+        return self.tiles_of(self.tracker.groups(loop=False))
 
     @property
     def loops(self) -> Loops:
@@ -502,44 +480,7 @@ class PseudoBoard(object):
         Returns:
             Loops: List of loops in the board.
         """
-        if self.dirty:
-            self.calculate_chains()
-        return self._loops
-
-
-def get_neighbors(tile: Tile) -> Tiles:
-    """Get neighbors of a tile.
-
-    Args:
-        tile (Tile): Tile to get neighbors.
-
-    Returns:
-        Tiles: List of neighbors of a tile.
-    """
-    (x, y) = tile
-    neighbors = []
-    if x != 0:
-        neighbors.append((x - 1, y))
-    if x != 2:
-        neighbors.append((x + 1, y))
-    if y != 0:
-        neighbors.append((x, y - 1))
-    if y != 2:
-        neighbors.append((x, y + 1))
-    return neighbors
-
-
-def is_valid_tile(tile: Tile) -> bool:
-    """Check if a tile is valid.
-
-    Args:
-        tile (Tile): Tile to check.
-
-    Returns:
-        bool: True if tile is valid, False otherwise.
-    """
-    (x, y) = tile
-    return 0 <= x < 3 and 0 <= y < 3
+        return self.tiles_of(self.tracker.groups(loop=True))
 
 
 def h_line(cond: bool) -> str:
@@ -0,0 +1,376 @@
+"""Symmetries of the board.
+
+A board of rows x cols boxes is unchanged by reflections and a half
+turn, and also by quarter turns and diagonal reflections when square
+(the dihedral group, 8 symmetries). Every symmetry maps dots to dots,
+so it permutes the edges and the tiles of the layout.
+
+Symmetric positions have the same value, so they can share table
+entries under a canonical key: the smallest Zobrist hash among the
+images of a position. Moves are stored in the frame of that image and
+mapped back when read.
+"""
+from functools import lru_cache
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from datatypes import Move, Moves
+from GameAction import GameAction
+from GameState import GameState
+from layout import Layout, get_layout, layout_of
+
+Dot = Tuple[int, int]
+DotMap = Callable[[int, int, int, int], Dot]
+
+# Maps of a dot (r, c) of a board with rows x cols boxes
+REFLECTIONS: Tuple[DotMap, ...] = (
+    lambda r, c, rows, cols: (r, c),
+    lambda r, c, rows, cols: (rows - r, c),
+    lambda r, c, rows, cols: (r, cols - c),
+    lambda r, c, rows, cols: (rows - r, cols - c),
+)
+# Only for square boards
+TRANSPOSITIONS: Tuple[DotMap, ...] = (
+    lambda r, c, rows, cols: (c, r),
+    lambda r, c, rows, cols: (cols - c, r),
+    lambda r, c, rows, cols: (c, rows - r),
+    lambda r, c, rows, cols: (cols - c, rows - r),
+)
+
+
+class Symmetries(object):
+    """Edge and tile permutations of the symmetries of a layout."""
+
+    def __init__(self, layout: Layout):
+        """Build the permutations of a layout.
+
+        The first symmetry is always the identity.
+
+        Args:
+            layout (Layout): Layout of the board.
+        """
+        (rows, cols) = (layout.rows, layout.cols)
+        maps = REFLECTIONS + (TRANSPOSITIONS if rows == cols else ())
+        self.layout = layout
+        self.edges: List[List[int]] = []
+        self.tiles: List[List[int]] = []
+        for dot_map in maps:
+            self.edges.append([
+                self.map_edge(dot_map, idx) for idx in range(layout.edge_count)
+            ])
+            self.tiles.append([
+                self.map_tile(dot_map, tile) for tile in layout.tiles
+            ])
+        self.inverse: List[List[int]] = []
+        for perm in self.edges:
+            inverse = [0] * layout.edge_count
+            for (edge, image) in enumerate(perm):
+                inverse[image] = edge
+            self.inverse.append(inverse)
+
+        # Zobrist keys of the images, by edge (tile) then symmetry
+        self.edge_keys: List[Tuple[int, ...]] = [
+            tuple(layout.edge_keys[perm[edge]] for perm in self.edges)
+            for edge in range(layout.edge_count)
+        ]
+        self.box_keys: List[List[Tuple[int, ...]]] = [
+            [
+                tuple(keys[perm[tile]] for perm in self.tiles)
+                for tile in range(layout.size)
+            ]
+            for keys in layout.box_keys
+        ]
+
+    def __len__(self) -> int:
+        """Count symmetries.
+
+        Returns:
+            int: Number of symmetries, identity included.
+        """
+        return len(self.edges)
+
+    def map_edge(self, dot_map: DotMap, idx: int) -> int:
+        """Get the image of an edge.
+
+        Args:
+            dot_map (DotMap): Map of the dots.
+            idx (int): Index of the edge.
+
+        Returns:
+            int: Index of the image.
+        """
+        layout = self.layout
+        (orientation, (x, y)) = layout.moves[idx]
+        end = (x, y + 1) if orientation == 'row' else (x + 1, y)
+        (a, b) = sorted(
+            dot_map(*dot, layout.rows, layout.cols) for dot in ((x, y), end)
+        )
+        if a[0] == b[0]:
+            return layout.index('row', a)
+        return layout.index('col', a)
+
+    def map_tile(self, dot_map: DotMap, tile: Tuple[int, int]) -> int:
+        """Get the image of a tile.
+
+        Args:
+            dot_map (DotMap): Map of the dots.
+            tile (Tuple[int, int]): The tile.
+
+        Returns:
+            int: Index of the image.
+        """
+        layout = self.layout
+        (x, y) = tile
+        (a, b) = (
+            dot_map(*dot, layout.rows, layout.cols)
+            for dot in ((x, y), (x + 1, y + 1))
+        )
+        return layout.tile_index((min(a[0], b[0]), min(a[1], b[1])))
+
+    def transform(self, edges: int, sym: int) -> int:
+        """Get the image of a set of edges.
+
+        Args:
+            edges (int): Bitmask of edges.
+            sym (int): Index of the symmetry.
+
+        Returns:
+            int: Bitmask of the images.
+        """
+        perm = self.edges[sym]
+        image = 0
+        while edges:
+            low = edges & -edges
+            image |= 1 << perm[low.bit_length() - 1]
+            edges ^= low
+        return image
+
+    def canonical(self, edges: int) -> Tuple[int, int]:
+        """Get the smallest image of a set of edges.
+
+        Args:
+            edges (int): Bitmask of edges.
+
+        Returns:
+            Tuple[int, int]: The smallest image and its symmetry index.
+        """
+        return min(
+            (self.transform(edges, sym), sym) for sym in range(len(self))
+        )
+
+    def stabilizer(self, edges: int) -> List[int]:
+        """Get the symmetries leaving a set of edges unchanged.
+
+        Args:
+            edges (int): Bitmask of edges.
+
+        Returns:
+            List[int]: Indexes of the symmetries, identity first.
+        """
+        return [
+            sym
+            for sym in range(len(self))
+            if self.transform(edges, sym) == edges
+        ]
+
+    def map_move(self, move: Move, sym: int) -> Move:
+        """Get the image of a move.
+
+        Args:
+            move (Move): The move.
+            sym (int): Index of the symmetry.
+
+        Returns:
+            Move: Its image.
+        """
+        layout = self.layout
+        return layout.moves[self.edges[sym][layout.edge_index[move]]]
+
+    def unmap_move(self, move: Move, sym: int) -> Move:
+        """Get the move whose image is a move.
+
+        Args:
+            move (Move): The image.
+            sym (int): Index of the symmetry.
+
+        Returns:
+            Move: The move.
+        """
+        layout = self.layout
+        return layout.moves[self.inverse[sym][layout.edge_index[move]]]
+
+    def unique_moves(self, moves: Moves, edges: int) -> Moves:
+        """Remove moves symmetric to a previous one.
+
+        Moves are symmetric when a symmetry leaving the position unchanged
+        maps one onto the other, so they have the same value.
+
+        Args:
+            moves (Moves): Moves to filter, in order.
+            edges (int): Bitmask of edges of the position.
+
+        Returns:
+            Moves: The first move of every class, in order.
+        """
+        stabilizer = self.stabilizer(edges)
+        if len(stabilizer) == 1:
+            return moves
+        layout = self.layout
+        seen = set()
+        unique: Moves = []
+        for move in moves:
+            idx = layout.edge_index[move]
+            orbit = min(self.edges[sym][idx] for sym in stabilizer)
+            if orbit not in seen:
+                seen.add(orbit)
+                unique.append(move)
+        return unique
+
+    def map_state(self, state: GameState, sym: int) -> GameState:
+        """Get the image of a game state.
+
+        Args:
+            state (GameState): The game state.
+            sym (int): Index of the symmetry.
+
+        Returns:
+            GameState: Its image.
+        """
+        layout = self.layout
+        image = GameState(
+            np.zeros_like(state.board_status),
+            np.zeros_like(state.row_status),
+            np.zeros_like(state.col_status),
+            state.player1_turn,
+        )
+        for idx, (orientation, position) in enumerate(layout.moves):
+            (image_orientation, image_position) = layout.moves[
+                self.edges[sym][idx]
+            ]
+            image.status(image_orientation)[image_position] = (
+                state.status(orientation)[position]
+            )
+        for idx, tile in enumerate(layout.tiles):
+            image_tile = layout.tiles[self.tiles[sym][idx]]
+            image.board_status[image_tile] = state.board_status[tile]
+        return image
+
+
+class SymmetricHash(object):
+    """
+    Zobrist hashes of the images of a position, kept up to date.
+
+    The turn key is the same for every image, so it is left out and only
+    added to the canonical key.
+    """
+
+    def __init__(self, symmetries: Symmetries, edges: int, boxes: List[int]):
+        """Hash the images of a position.
+
+        Args:
+            symmetries (Symmetries): Symmetries of the board.
+            edges (int): Bitmask of marked edges.
+            boxes (List[int]): Bitmask of owned tiles for each player.
+        """
+        self.symmetries = symmetries
+        self.hashes = [0] * len(symmetries)
+        for edge in range(symmetries.layout.edge_count):
+            if edges >> edge & 1:
+                self.edge(edge)
+        for player, owned in enumerate(boxes):
+            for tile in range(symmetries.layout.size):
+                if owned >> tile & 1:
+                    self.box(player, tile)
+
+    def edge(self, edge: int):
+        """Toggle an edge.
+
+        Args:
+            edge (int): Index of the edge.
+        """
+        self.hashes = [
+            key ^ image
+            for (key, image) in zip(
+                self.hashes, self.symmetries.edge_keys[edge],
+            )
+        ]
+
+    def box(self, player: int, tile: int):
+        """Toggle a box of a player.
+
+        Args:
+            player (int): Value of the player.
+            tile (int): Index of the tile.
+        """
+        self.hashes = [
+            key ^ image
+            for (key, image) in zip(
+                self.hashes, self.symmetries.box_keys[player][tile],
+            )
+        ]
+
+    def canonical(self, player1_turn: bool) -> Tuple[int, int]:
+        """Get the canonical key of the position.
+
+        Args:
+            player1_turn (bool): True if it is player 1 turn.
+
+        Returns:
+            Tuple[int, int]: The smallest hash among the images, and the
+                index of the symmetry giving it.
+        """
+        key = min(self.hashes)
+        sym = self.hashes.index(key)
+        if player1_turn:
+            key ^= self.symmetries.layout.turn_key
+        return (key, sym)
+
+
+@lru_cache(maxsize=None)
+def get_symmetries(rows: int, cols: int) -> Symmetries:
+    """Get the (cached) symmetries of a board size.
+
+    Args:
+        rows (int): Number of tile rows.
+        cols (int): Number of tile columns.
+
+    Returns:
+        Symmetries: Symmetries of the board.
+    """
+    return Symmetries(get_layout(rows, cols))
+
+
+def canonical_state(state: GameState) -> Tuple[GameState, int]:
+    """Get the canonical image of a game state.
+
+    Args:
+        state (GameState): The game state.
+
+    Returns:
+        Tuple[GameState, int]: The image with the smallest edges bitmask,
+            and the index of its symmetry.
+    """
+    layout = layout_of(state)
+    symmetries = get_symmetries(layout.rows, layout.cols)
+    (_, sym) = symmetries.canonical(layout.edges_of(state))
+    return (symmetries.map_state(state, sym), sym)
+
+
+def unmap_action(state: GameState, action: GameAction, sym: int) -> GameAction:
+    """Map an action of a canonical image back to the original state.
+
+    Args:
+        state (GameState): The original game state.
+        action (GameAction): Action in the image.
+        sym (int): Index of the symmetry of the image.
+
+    Returns:
+        GameAction: The action in the original state.
+    """
+    layout = layout_of(state)
+    symmetries = get_symmetries(layout.rows, layout.cols)
+    move = symmetries.unmap_move(
+        Move(action.action_type, action.position[::-1]), sym,
+    )
+    return GameAction(move.orientation, move.position[::-1])
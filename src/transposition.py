@@ -0,0 +1,107 @@
+"""Transposition table definition."""
+from typing import List, Optional
+
+from datatypes import Bound, Move, TableEntry
+
+TABLE_SIZE = 1 << 18
+
+
+class TranspositionTable(object):
+    """
+    A fixed size hash table of searched positions.
+
+    Positions are keyed by their Zobrist hash and stored in slot
+    key % size. When two positions compete for a slot, the entry searched
+    deeper is kept, unless it is left over from an older search.
+    """
+
+    def __init__(self, size: int = TABLE_SIZE):
+        """Initialize an empty table.
+
+        Args:
+            size (int, optional): Number of slots. Defaults to TABLE_SIZE.
+        """
+        self.size = size
+        self.slots: List[Optional[TableEntry]] = [None] * size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def __len__(self) -> int:
+        """Count filled slots.
+
+        Returns:
+            int: Number of filled slots.
+        """
+        return self.size - self.slots.count(None)
+
+    def new_search(self):
+        """Start a new search, aging every stored entry."""
+        self.generation += 1
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        self.slots = [None] * self.size
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def probe(self, key: int) -> Optional[TableEntry]:
+        """Get the entry of a position.
+
+        Args:
+            key (int): Hash of the position.
+
+        Returns:
+            Optional[TableEntry]: The entry, None if not found.
+        """
+        entry = self.slots[key % self.size]
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.key != key:
+            self.collisions += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(
+        self,
+        key: int,
+        depth: int,
+        score: int,
+        bound: Bound,
+        move: Move,
+    ):
+        """Store the result of a search.
+
+        Args:
+            key (int): Hash of the position.
+            depth (int): Remaining depth searched below the position.
+            score (int): Score of the position.
+            bound (Bound): Whether score is exact, lower or upper bound.
+            move (Move): Best move found.
+        """
+        idx = key % self.size
+        old = self.slots[idx]
+        if (
+            old is None or
+            old.key == key or
+            old.generation != self.generation or
+            depth >= old.depth
+        ):
+            self.slots[idx] = TableEntry(
+                key, depth, score, bound, move, self.generation,
+            )
+            self.stores += 1
+
+    def stats(self) -> str:
+        """Return hit/miss/collision counters.
+
+        Returns:
+            str: Counters of the table.
+        """
+        return (
+            f'TT hits: {self.hits}, misses: {self.misses}, '
+            f'collisions: {self.collisions}'
+        )
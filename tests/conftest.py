@@ -0,0 +1,5 @@
+"""Make the modules of src importable by name, like the scripts do."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
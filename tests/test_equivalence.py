@@ -0,0 +1,52 @@
+"""Tests of the classes of equivalent moves."""
+from copy import deepcopy
+
+import pytest
+
+from benchmark import CORPUS, make_state
+from equivalence_check import check_exact, positions
+from local_search_agent import LocalSearchAgent
+from minimax_agent import MinimaxAgent
+from player import Player
+
+POSITIONS = {position.name: position for position in CORPUS}
+
+
+@pytest.mark.parametrize('rows, cols', [(2, 2), (2, 3)])
+def test_classes_match_perfect_solution(rows, cols):
+    assert check_exact(rows, cols, samples=300, seed=0) == 0
+
+
+# Positions where classes do merge moves
+@pytest.mark.parametrize('name', ['3x3-middle', '5x5-middle'])
+def test_minimax_score_kept(name):
+    position = POSITIONS[name]
+    state = make_state(position)
+    (scores, nodes) = ([], [])
+    for equivalence in (False, True):
+        agent = MinimaxAgent(
+            deepcopy(state), depth=position.depth, equivalence=equivalence,
+        )
+        (_, score) = agent.search()
+        scores.append(score)
+        nodes.append(agent.evaluated)
+    assert scores[0] == scores[1]
+    assert nodes[1] < nodes[0]
+
+
+@pytest.mark.parametrize(
+    'position', list(positions()), ids=lambda position: position.name,
+)
+def test_local_search_score_kept(position):
+    state = make_state(position)
+    scores = []
+    for equivalence in (False, True):
+        agent = LocalSearchAgent(
+            deepcopy(state),
+            Player.of(state.player1_turn),
+            batch=False,
+            equivalence=equivalence,
+        )
+        (_, score) = agent.search()
+        scores.append(score)
+    assert scores[0] == scores[1]